@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线基准测试 - 启动本地仿真面板，用 RealMouseRenewBot 跑完整流程 N 次
+统计端到端和各阶段耗时的中位数/P95，结果写入JSON便于在提交之间对比
+
+    python benchmark.py --runs 5 --latency-ms 100 --headless
+    python benchmark.py --runs 5 --headless --backend playwright
+    python benchmark.py --runs 5 --compare bench_results_old.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Login</title></head>
+<body>
+<form method="post" action="/auth/login">
+  <input id="email" name="email" type="email">
+  <input id="password" name="password" type="password">
+  <button id="submit" type="submit">Login</button>
+</form>
+</body></html>
+"""
+
+DASHBOARD_PAGE = """<!DOCTYPE html>
+<html><head><title>Dashboard</title></head>
+<body><h1>Dashboard</h1></body></html>
+"""
+
+RENEW_PAGE = """<!DOCTYPE html>
+<html><head><title>Server</title></head>
+<body>
+<h1>Server {server_id}</h1>
+<div>Expiry: <b>{expiry}</b></div>
+<button type="button" class="btn btn-outline-primary" onclick="renew()">Renew</button>
+<div id="result"></div>
+<script>
+function renew() {{
+  fetch('/api/renew?id={server_id}', {{method: 'POST'}})
+    .then(r => r.json())
+    .then(d => {{
+      const token = document.createElement('input');
+      token.type = 'hidden';
+      token.name = 'cf-turnstile-response';
+      token.value = d.token;
+      document.body.appendChild(token);
+      document.getElementById('result').textContent = 'Renewed';
+    }});
+}}
+</script>
+</body></html>
+"""
+
+SESSION_COOKIE = 'kb_bench_session'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """仿真面板：登录页、仪表盘、续期页和续期接口"""
+
+    latency = 0.0
+    renew_count = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body='', content_type='text/html; charset=utf-8', headers=None):
+        time.sleep(self.latency)
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _logged_in(self):
+        return f'{SESSION_COOKIE}=' in (self.headers.get('Cookie') or '')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/auth/login':
+            self._send(200, LOGIN_PAGE)
+        elif not self._logged_in():
+            self._send(302, headers={'Location': '/auth/login'})
+        elif url.path == '/dashboard':
+            self._send(200, DASHBOARD_PAGE)
+        elif url.path == '/servers/edit':
+            server_id = parse_qs(url.query).get('id', ['1'])[0]
+            self._send(200, RENEW_PAGE.format(server_id=server_id, expiry=datetime.now(timezone.utc).date()))
+        else:
+            self._send(404, 'not found')
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        if url.path == '/auth/login':
+            if form.get('email') and form.get('password'):
+                self._send(303, headers={
+                    'Location': '/dashboard',
+                    'Set-Cookie': f'{SESSION_COOKIE}=ok; Path=/; Max-Age=86400',
+                })
+            else:
+                self._send(200, LOGIN_PAGE)
+        elif url.path == '/api/renew' and self._logged_in():
+            type(self).renew_count += 1
+            self._send(200, json.dumps({'token': 'bench-token-' + 'x' * 32}), 'application/json')
+        else:
+            self._send(403, 'forbidden')
+
+
+def start_stand_in(latency_ms):
+    """在后台线程启动仿真面板，返回 (server, base_url)"""
+    StandInHandler.latency = latency_ms / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def percentile(values, pct):
+    """最近秩法百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(values):
+    return {
+        'count': len(values),
+        'median_ms': percentile(values, 50),
+        'p95_ms': percentile(values, 95),
+        'min_ms': min(values) if values else None,
+        'max_ms': max(values) if values else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def run_once():
+    """跑一次完整流程（含HTTP预检和截图收尾，与生产一致），返回 (是否成功, 端到端毫秒, 运行报告)"""
+    from main import RealMouseRenewBot
+
+    bot = RealMouseRenewBot()
+    start = time.monotonic()
+    success = await bot.run()
+    total_ms = round((time.monotonic() - start) * 1000, 1)
+    return success, total_ms, bot.report.to_dict(success)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线基准测试：本地仿真面板 + 完整续期流程')
+    parser.add_argument('--runs', type=int, default=5, help='运行次数')
+    parser.add_argument('--latency-ms', type=float, default=0, help='仿真面板每个响应的延迟')
+    parser.add_argument('--headless', action='store_true', help='无头模式，不需要Xvfb')
+    parser.add_argument('--backend', choices=['selenium', 'playwright'], default='selenium', help='浏览器后端')
+    parser.add_argument('--lean', action='store_true', help='启用精简模式（LEAN_MODE）')
+    parser.add_argument('--session-dir', help='启用会话缓存（测试跳过登录的路径）')
+    parser.add_argument('--servers', type=int, default=1, help='同一账号下的服务器数量（多标签页续期）')
+    parser.add_argument('--output', default='bench_results.json', help='结果文件')
+    parser.add_argument('--compare', help='与之前的结果文件对比中位数')
+    args = parser.parse_args()
+
+    server, base_url = start_stand_in(args.latency_ms)
+    os.environ.update({
+        'EMAIL': 'bench@example.com',
+        'PASSWORD': 'bench-password',
+        'LOGIN_URL': f'{base_url}/auth/login',
+        'RENEW_URL': ','.join(f'{base_url}/servers/edit?id={i}' for i in range(1, args.servers + 1)),
+    })
+    os.environ.pop('RUN_REPORT_PATH', None)
+    # 不写入真实的运行历史
+    os.environ.pop('HISTORY_PATH', None)
+    os.environ['BROWSER_BACKEND'] = args.backend
+    if args.headless:
+        os.environ['HEADLESS'] = '1'
+    if args.lean:
+        os.environ['LEAN_MODE'] = '1'
+    else:
+        os.environ.pop('LEAN_MODE', None)
+    if args.session_dir:
+        os.environ['SESSION_DIR'] = args.session_dir
+    else:
+        os.environ.pop('SESSION_DIR', None)
+
+    runs = []
+    try:
+        for i in range(args.runs):
+            success, total_ms, report = asyncio.run(run_once())
+            runs.append({'success': success, 'total_ms': total_ms, 'report': report})
+            print(f'run {i + 1}/{args.runs}: {"ok" if success else "FAILED"} {total_ms:.0f}ms')
+    finally:
+        server.shutdown()
+
+    # 只统计成功的运行
+    ok_runs = [r for r in runs if r['success']]
+    steps = {}
+    for run in ok_runs:
+        for span in run['report']['spans']:
+            steps.setdefault(span['name'], []).append(span['duration_ms'])
+
+    results = {
+        'revision': git_revision(),
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': {'runs': args.runs, 'latency_ms': args.latency_ms, 'headless': args.headless, 'backend': args.backend,
+                   'lean': args.lean, 'session_cache': bool(args.session_dir), 'servers': args.servers},
+        'failures': len(runs) - len(ok_runs),
+        'total': summarize([r['total_ms'] for r in ok_runs]),
+        'steps': {name: summarize(values) for name, values in steps.items()},
+        'peak_rss_mb': summarize([r['report'].get('memory', {}).get('peak_rss_mb') for r in ok_runs
+                                  if r['report'].get('memory', {}).get('peak_rss_mb')]),
+        'runs': runs,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(f'\n{"step":<22}{"median":>10}{"p95":>10}')
+    for name, stats in [('total', results['total'])] + list(results['steps'].items()):
+        if stats['count']:
+            print(f'{name:<22}{stats["median_ms"]:>10.0f}{stats["p95_ms"]:>10.0f}')
+    if results['peak_rss_mb']['count']:
+        print(f'{"peak_rss_mb":<22}{results["peak_rss_mb"]["median_ms"]:>10.0f}{results["peak_rss_mb"]["p95_ms"]:>10.0f}')
+    print(f'\n结果已保存: {args.output}')
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f'\n对比 {args.compare} ({baseline.get("revision")}) 的中位数:')
+        pairs = [('total', results['total'], baseline.get('total', {}))]
+        pairs += [(name, stats, baseline.get('steps', {}).get(name, {})) for name, stats in results['steps'].items()]
+        for name, stats, old in pairs:
+            if stats.get('median_ms') is not None and old.get('median_ms'):
+                delta = stats['median_ms'] - old['median_ms']
+                print(f'{name:<22}{old["median_ms"]:>10.0f} -> {stats["median_ms"]:<10.0f}{delta:+.0f}ms')
+
+    sys.exit(1 if results['failures'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器后端接口 - 续期流程的每一步（启动、登录、打开续期页、点击、验证）由具体后端实现
+通过 BROWSER_BACKEND 选择:
+    selenium    undetected_chromedriver + pyautogui 真实鼠标（默认）
+    playwright  Playwright 持久化上下文，自带自动等待
+"""
+
+import os
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from log_setup import current_phase
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+RENEW_BUTTON_SELECTOR = 'button.btn.btn-outline-primary'
+
+BACKENDS = ('selenium', 'playwright')
+
+# 当前协程操作的标签页句柄（由 BrowserBackend.tab 设置），未设置时为主标签页
+current_tab = ContextVar('current_tab', default=None)
+
+
+class BrowserBackend:
+    """后端基类；配置、运行报告、截图管理都从 bot 读取（守护进程每次续期会换新的报告）"""
+
+    name = None
+    # 导入失败时提示的安装命令
+    install_hint = None
+    # 可同时操作的标签页数量上限，None 表示不限
+    max_tabs = None
+
+    def __init__(self, bot):
+        self.bot = bot
+        # 条件等待记录: (描述, 实际等待秒数, 是否满足)
+        self.wait_history = []
+        # 精简模式下生效的拦截规则
+        self.blocked_url_patterns = None
+        # 网络瀑布图（WATERFALL 启用时由 start 创建）
+        self.waterfall = None
+
+    @property
+    def report(self):
+        return self.bot.report
+
+    @property
+    def screenshots(self):
+        return self.bot.screenshots
+
+    async def start(self):
+        """启动浏览器，失败返回 False"""
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+    async def alive(self):
+        """浏览器仍可用时返回 True，用于决定重试时能否复用"""
+        return False
+
+    async def add_cookies(self, cookies):
+        """导航前注入缓存的cookie（selenium get_cookies 格式），成功返回 True"""
+        raise NotImplementedError
+
+    async def get_cookies(self):
+        """返回 selenium get_cookies 格式的cookie列表，供会话缓存保存"""
+        raise NotImplementedError
+
+    async def open_renew_page(self, url=None):
+        """打开续期页面，被重定向到登录页时返回 False"""
+        raise NotImplementedError
+
+    async def login(self):
+        """完整的登录流程，成功返回 True"""
+        raise NotImplementedError
+
+    async def click_renew(self):
+        """找到并点击续期按钮"""
+        raise NotImplementedError
+
+    async def verify(self):
+        """处理Turnstile验证，完成返回 True"""
+        raise NotImplementedError
+
+    async def settle(self):
+        """等待续期请求发送完毕"""
+        raise NotImplementedError
+
+    async def capture(self, name):
+        """截取一帧交给截图管理器"""
+        raise NotImplementedError
+
+    async def new_tab(self):
+        """在同一浏览器（共享cookie）中打开空白标签页，返回句柄"""
+        raise NotImplementedError
+
+    async def close_tab(self, handle):
+        raise NotImplementedError
+
+    @asynccontextmanager
+    async def tab(self):
+        """打开新标签页，块内当前协程的所有操作都作用于该标签页，退出时关闭"""
+        handle = await self.new_tab()
+        token = current_tab.set(handle)
+        try:
+            yield handle
+        finally:
+            current_tab.reset(token)
+            try:
+                await self.close_tab(handle)
+            except Exception as e:
+                logger.warning(f'⚠️ 关闭标签页失败: {e}')
+
+    def begin_page(self, url=None):
+        """导航或提交表单前调用：之后的请求归入以当前阶段命名的新页面（只跟踪主标签页）"""
+        if self.waterfall is None or current_tab.get() is not None:
+            return
+        self.drain_network_events()
+        self.waterfall.begin(current_phase.get() or 'page', url)
+
+    def drain_network_events(self):
+        """把浏览器缓存的网络事件交给瀑布图；事件实时推送的后端无需实现"""
+
+    def write_waterfall(self):
+        """写出网络瀑布图，返回文件路径"""
+        if self.waterfall is None:
+            return None
+        try:
+            self.drain_network_events()
+        except Exception as e:
+            logger.warning(f'⚠️ 读取网络事件失败: {e}')
+        return self.waterfall.write()
+
+    def process_ids(self):
+        """浏览器相关进程的根PID，用于内存采样"""
+        return []
+
+
+def backend_name():
+    name = (os.getenv('BROWSER_BACKEND') or 'selenium').lower()
+    if name not in BACKENDS:
+        logger.warning(f'⚠️ 未知的浏览器后端 {name}，使用 selenium')
+        name = 'selenium'
+    return name
+
+
+def create_backend(bot, name=None):
+    """按名字创建后端；具体实现按需导入，避免加载用不到的浏览器库"""
+    name = name or backend_name()
+    if name == 'playwright':
+        from playwright_backend import PlaywrightBackend
+        return PlaywrightBackend(bot)
+    from selenium_backend import SeleniumBackend
+    return SeleniumBackend(bot)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+守护进程模式 - 常驻运行，浏览器和登录会话在多次续期之间保持打开
+按内部计划（asyncio定时器）执行续期，定期检查浏览器，崩溃或内存过高时重启，
+并在本地提供状态接口:
+
+    python daemon.py
+    curl http://127.0.0.1:8787/status       # 当前状态(JSON)
+    curl -X POST http://127.0.0.1:8787/renew # 立即续期
+
+    DAEMON_INTERVAL_HOURS   两次续期的最长间隔（默认12）；设置 HISTORY_PATH 时按到期时间提前
+    DAEMON_RETRY_MINUTES    续期失败后多久重试（默认30）
+    DAEMON_HEALTH_SECONDS   浏览器健康检查间隔（默认60）
+    DAEMON_MAX_RSS_MB       浏览器进程树内存上限，超出后重启浏览器（默认1024，0为不限）
+    DAEMON_STATUS_HOST      状态接口监听地址（默认127.0.0.1）
+    DAEMON_STATUS_PORT      状态接口端口（默认8787，0为不启动）
+
+Selenium后端的调用是同步阻塞的，续期期间事件循环无法处理其他任务，
+所以状态接口运行在独立线程中，续期进行时也能查询。
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import lean_mode
+from browser_backend import create_backend
+from main import RealMouseRenewBot
+
+logger = logging.getLogger(__name__)
+
+
+def _iso(moment):
+    return moment.isoformat(timespec='seconds') if moment else None
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    """GET /status 返回状态，POST /renew 立即续期（在状态接口线程中执行）"""
+
+    def log_message(self, format, *args):
+        logger.debug(f'状态接口: {format % args}')
+
+    def _reply(self, code, body):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path in ('/', '/status'):
+            self._reply(200, self.server.renew_daemon.status())
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path == '/renew':
+            # 计划在事件循环中修改；续期进行中时在本次结束后立即再续期一次
+            self.server.loop.call_soon_threadsafe(self.server.renew_daemon.schedule, 0)
+            self._reply(202, {'scheduled': True})
+        else:
+            self._reply(404, {'error': 'not found'})
+
+
+class RenewDaemon:
+    """常驻续期：一个浏览器、一个计划、一个状态接口"""
+
+    def __init__(self, bot, interval_hours=12, retry_minutes=30, health_seconds=60, max_rss_mb=1024,
+                 host='127.0.0.1', port=8787):
+        self.bot = bot
+        self.interval = timedelta(hours=interval_hours)
+        self.retry = timedelta(minutes=retry_minutes)
+        self.health_seconds = health_seconds
+        self.max_rss_mb = max_rss_mb
+        self.host = host
+        self.port = port
+
+        bot.keep_browser = True
+        bot.backend = create_backend(bot)
+        self.backend = bot.backend
+        self.memory = lean_mode.MemorySampler([])
+
+        self.state = 'starting'
+        self.started_at = datetime.now(timezone.utc)
+        self.next_run_at = None
+        self.last_run = None
+        self.runs = 0
+        self.failures = 0
+        self.restarts = 0
+        # 续期和重启浏览器互斥
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._timer = None
+
+    @classmethod
+    def from_env(cls, bot):
+        return cls(
+            bot,
+            interval_hours=float(os.getenv('DAEMON_INTERVAL_HOURS') or 12),
+            retry_minutes=float(os.getenv('DAEMON_RETRY_MINUTES') or 30),
+            health_seconds=float(os.getenv('DAEMON_HEALTH_SECONDS') or 60),
+            max_rss_mb=float(os.getenv('DAEMON_MAX_RSS_MB') or 1024),
+            host=os.getenv('DAEMON_STATUS_HOST') or '127.0.0.1',
+            port=int(os.getenv('DAEMON_STATUS_PORT') or 8787),
+        )
+
+    # ---- 计划 ----
+
+    def schedule(self, delay):
+        """delay 秒后唤醒主循环执行续期"""
+        if self._timer is not None:
+            self._timer.cancel()
+        self.next_run_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._wake.set)
+        logger.info(f'📅 下一次续期: {self.next_run_at.astimezone():%Y-%m-%d %H:%M:%S}')
+
+    def next_delay(self, success):
+        """失败后按重试间隔；成功后按到期时间（有运行历史时），不超过最长间隔"""
+        if not success:
+            return self.retry.total_seconds()
+        delay = self.interval
+        if self.bot.history:
+            result = self.bot.history.next_due()
+            if not result.due:
+                delay = min(delay, result.wait)
+            logger.info(f'📅 运行历史: {result.reason}')
+        return max(delay.total_seconds(), 0)
+
+    def stop(self):
+        logger.info('🛑 收到停止信号，完成当前操作后退出')
+        self._stopping = True
+        self._wake.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        server = self.start_status_server(loop) if self.port else None
+        health = asyncio.create_task(self._health_loop())
+
+        try:
+            # 启动时先预热浏览器，之后的续期只需要几秒
+            async with self._lock:
+                await self._start_browser('预热')
+
+            first_delay = 0
+            if self.bot.history:
+                result = self.bot.history.next_due()
+                logger.info(f'📅 运行历史: {result.reason}')
+                first_delay = 0 if result.due else min(result.wait, self.interval).total_seconds()
+            self.schedule(first_delay)
+
+            while True:
+                self.state = 'idle'
+                await self._wake.wait()
+                self._wake.clear()
+                if self._stopping:
+                    break
+                success = await self.renew_once()
+                self.schedule(self.next_delay(success))
+        finally:
+            self.state = 'stopping'
+            if self._timer is not None:
+                self._timer.cancel()
+            health.cancel()
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+            try:
+                await self.backend.close()
+            except Exception as e:
+                logger.warning(f'⚠️ 关闭浏览器失败: {e}')
+            logger.info('👋 守护进程已退出')
+
+    async def renew_once(self):
+        """执行一次完整续期（预检 + 续期 + 报告），返回是否成功"""
+        async with self._lock:
+            self.state = 'renewing'
+            self.bot.new_run()
+            start = time.monotonic()
+            try:
+                success = await self.bot.run()
+            except Exception as e:
+                logger.error(f'💥 续期执行异常: {e}')
+                success = False
+            elapsed = time.monotonic() - start
+            self.runs += 1
+            self.failures += 0 if success else 1
+            self.last_run = {
+                'finished_at': _iso(datetime.now(timezone.utc)),
+                'success': success,
+                'duration_s': round(elapsed, 1),
+            }
+            logger.info(f'{"🎉" if success else "❌"} 第 {self.runs} 次续期{"成功" if success else "失败"}，用时 {elapsed:.1f}秒')
+            # 续期中可能重启过浏览器
+            self.memory.track(self.backend.process_ids())
+            return success
+
+    # ---- 浏览器健康检查 ----
+
+    async def _start_browser(self, reason):
+        self.state = 'restarting'
+        logger.info(f'♻️ 启动浏览器 ({reason})...')
+        try:
+            await self.backend.close()
+        except Exception as e:
+            logger.warning(f'⚠️ 关闭浏览器失败: {e}')
+        self.bot.deadline.restart()
+        bot = self.bot
+        if not bot.headless and not bot.display_ready:
+            bot.display_ready = bot.setup_virtual_display()
+        try:
+            if await self.backend.start():
+                self.memory.track(self.backend.process_ids())
+                return True
+            logger.error('❌ 浏览器启动失败，下一次续期时重试')
+        except Exception as e:
+            logger.error(f'❌ 浏览器启动失败，下一次续期时重试: {e}')
+        return False
+
+    async def _health_problem(self):
+        if not await self.backend.alive():
+            return '浏览器已退出'
+        rss = self.memory.rss_mb()
+        if self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+            return f'内存 {rss:.0f}MB 超过上限 {self.max_rss_mb:.0f}MB'
+        return None
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_seconds)
+            if self._lock.locked():
+                continue
+            async with self._lock:
+                try:
+                    reason = await self._health_problem()
+                except Exception as e:
+                    reason = f'健康检查出错: {e}'
+                if reason:
+                    logger.warning(f'⚠️ {reason}')
+                    if await self._start_browser(reason):
+                        self.restarts += 1
+                self.state = 'idle'
+
+    # ---- 状态接口 ----
+
+    def status(self):
+        """当前状态；在状态接口线程中调用，只读取属性"""
+        return {
+            'state': self.state,
+            'backend': self.backend.name,
+            'started_at': _iso(self.started_at),
+            'next_run_at': _iso(self.next_run_at),
+            'last_run': self.last_run,
+            'runs': self.runs,
+            'failures': self.failures,
+            'browser_restarts': self.restarts,
+            'browser_rss_mb': round(self.memory.rss_mb() or 0, 1),
+            'servers': {url: _iso(expiry) for url, expiry in self.bot.expiries.items()},
+        }
+
+    def start_status_server(self, loop):
+        """在后台线程启动状态接口，返回 server（调用 shutdown() 停止）"""
+        server = ThreadingHTTPServer((self.host, self.port), _StatusHandler)
+        server.daemon_threads = True
+        server.renew_daemon = self
+        server.loop = loop
+        threading.Thread(target=server.serve_forever, name='status-server', daemon=True).start()
+        logger.info(f'📡 状态接口: http://{self.host}:{server.server_address[1]}/status')
+        return server
+
+
+async def main():
+    bot = RealMouseRenewBot()
+    await RenewDaemon.from_env(bot).run()
+
+
+if __name__ == '__main__':
+    if sys.platform.startswith('win'):
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    asyncio.run(main())
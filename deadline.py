@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行时限 - 整次运行有一个总时限，每个阶段再有各自的预算
+所有等待和页面加载都从剩余时间中扣除，时间用完时抛出 DeadlineExceeded
+
+    RUN_DEADLINE    总时限（秒，默认600）
+    PHASE_BUDGETS   覆盖阶段预算，例如 "verification_wait=60,renew_page_load=20"
+"""
+
+import os
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RUN_DEADLINE = 600
+
+# 阶段名与 RunReport.span 的名字一致；未列出的阶段只受总时限约束
+DEFAULT_PHASE_BUDGETS = {
+    'http_precheck': 10,
+    'browser_launch': 120,
+    'login_page_load': 45,
+    'form_submit': 45,
+    'renew_page_load': 45,
+    'renew_click': 30,
+    'verification_wait': 120,
+    'expiry_check': 15,
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """总时限或阶段预算已用完"""
+
+
+class Deadline:
+    """总时限 + 当前阶段预算"""
+
+    def __init__(self, total=DEFAULT_RUN_DEADLINE, budgets=None):
+        self.total = total
+        self.budgets = dict(DEFAULT_PHASE_BUDGETS if budgets is None else budgets)
+        self.run_end = time.monotonic() + total
+        # (阶段名, 阶段截止时间)；每个协程各自一份，多个标签页并发时互不干扰
+        self._phase = ContextVar(f'deadline_phase_{id(self)}', default=(None, None))
+        self.exceeded = None  # 第一次超时的阶段名
+
+    @classmethod
+    def from_env(cls):
+        total = float(os.getenv('RUN_DEADLINE') or DEFAULT_RUN_DEADLINE)
+        budgets = dict(DEFAULT_PHASE_BUDGETS)
+        for item in (os.getenv('PHASE_BUDGETS') or '').split(','):
+            if '=' in item:
+                name, value = item.split('=', 1)
+                budgets[name.strip()] = float(value)
+        return cls(total, budgets)
+
+    @property
+    def current(self):
+        """当前阶段名"""
+        return self._phase.get()[0]
+
+    def restart(self):
+        """重新开始计时（守护进程每次续期前调用）"""
+        self.run_end = time.monotonic() + self.total
+        self.exceeded = None
+
+    def remaining(self):
+        """当前阶段可用的秒数（阶段预算与总时限取较小者）"""
+        phase_end = self._phase.get()[1]
+        end = self.run_end if phase_end is None else min(self.run_end, phase_end)
+        return end - time.monotonic()
+
+    def check(self):
+        """时间已用完时抛出 DeadlineExceeded"""
+        if self.remaining() <= 0:
+            phase = self.current or 'run'
+            if self.exceeded is None:
+                self.exceeded = phase
+            scope = '总时限' if time.monotonic() >= self.run_end else '阶段预算'
+            raise DeadlineExceeded(f'{phase} 超出{scope}')
+
+    def clamp(self, timeout):
+        """把等待超时截断到剩余时间内；没有剩余时间时抛出 DeadlineExceeded"""
+        self.check()
+        return min(timeout, self.remaining())
+
+    @contextmanager
+    def phase(self, name):
+        """进入阶段，期间 remaining() 受该阶段预算约束"""
+        phase_end = self._phase.get()[1]
+        budget = self.budgets.get(name)
+        if budget:
+            end = time.monotonic() + budget
+            # 嵌套阶段不能超出外层阶段的预算
+            phase_end = end if phase_end is None else min(end, phase_end)
+        token = self._phase.set((name, phase_end))
+        try:
+            yield self
+        finally:
+            self._phase.reset(token)
+
+    def to_dict(self):
+        return {
+            'total_s': self.total,
+            'remaining_s': round(self.run_end - time.monotonic(), 1),
+            'exceeded_phase': self.exceeded,
+        }
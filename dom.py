@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量DOM操作 - 每次 execute_script 完成多个查找/测量，减少与chromedriver的HTTP往返
+"""
+
+# 按名字批量查找元素，返回元素、视口坐标和可见性
+_FIND_BATCH_JS = """
+const selectors = arguments[0];
+const result = {};
+for (const [name, selector] of Object.entries(selectors)) {
+    const el = document.querySelector(selector);
+    if (!el) { result[name] = null; continue; }
+    const r = el.getBoundingClientRect();
+    const style = window.getComputedStyle(el);
+    result[name] = {
+        element: el,
+        rect: {x: r.x, y: r.y, width: r.width, height: r.height},
+        visible: r.width > 0 && r.height > 0 && style.visibility !== 'hidden' && style.display !== 'none',
+        enabled: !el.disabled,
+    };
+}
+return result;
+"""
+
+# 立即滚动到元素（不使用平滑滚动，无需等待动画），返回滚动后的视口坐标
+_SCROLL_AND_MEASURE_JS = """
+const el = arguments[0];
+el.scrollIntoView({block: 'center', inline: 'center', behavior: 'instant'});
+const r = el.getBoundingClientRect();
+return {x: r.x, y: r.y, width: r.width, height: r.height};
+"""
+
+
+def find_batch(driver, selectors):
+    """selectors 为 {名字: CSS选择器}，一次往返返回 {名字: {element, rect, visible, enabled} 或 None}"""
+    return driver.execute_script(_FIND_BATCH_JS, selectors)
+
+
+def elements_ready(selectors):
+    """等待条件：所有元素都存在、可见且可用，返回 find_batch 的结果"""
+    def _condition(driver):
+        found = find_batch(driver, selectors)
+        if all(item and item['visible'] and item['enabled'] for item in found.values()):
+            return found
+        return False
+    _condition.__name__ = '元素就绪 ' + ', '.join(selectors.values())
+    return _condition
+
+
+def scroll_and_measure(driver, element):
+    """滚动元素到视口中央并返回最终的视口坐标 {x, y, width, height}"""
+    return driver.execute_script(_SCROLL_AND_MEASURE_JS, element)
+
+
+def center(rect):
+    """矩形中心点（整数像素）"""
+    return int(rect['x'] + rect['width'] / 2), int(rect['y'] + rect['height'] / 2)
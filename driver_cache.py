@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+chromedriver缓存 - 按已安装Chrome的主版本号缓存已打补丁的chromedriver
+缓存命中时直接交给 undetected_chromedriver 使用，跳过下载和打补丁
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+CHROME_BINARIES = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome']
+DRIVER_NAME = 'chromedriver.exe' if os.name == 'nt' else 'chromedriver'
+
+
+def detect_chrome_major():
+    """读取已安装Chrome的主版本号，失败返回 None"""
+    for binary in CHROME_BINARIES:
+        path = shutil.which(binary)
+        if not path:
+            continue
+        try:
+            output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r'(\d+)\.\d+\.\d+', output)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DriverCache:
+    """DRIVER_CACHE_DIR/chrome-<主版本>/ 下保存 chromedriver 和校验信息"""
+
+    def __init__(self, directory, chrome_major):
+        self.directory = directory
+        self.chrome_major = chrome_major
+        self.entry_dir = os.path.join(directory, f'chrome-{chrome_major}')
+        self.driver_path = os.path.join(self.entry_dir, DRIVER_NAME)
+        self.meta_path = os.path.join(self.entry_dir, 'meta.json')
+
+    @classmethod
+    def from_env(cls):
+        """DRIVER_CACHE_DIR 未设置或检测不到Chrome版本时返回 None"""
+        directory = os.getenv('DRIVER_CACHE_DIR')
+        if not directory:
+            return None
+        directory = os.path.expanduser(directory)
+        chrome_major = detect_chrome_major()
+        if not chrome_major:
+            logger.warning('⚠️ 无法检测Chrome版本，不使用chromedriver缓存')
+            return None
+        return cls(directory, chrome_major)
+
+    def lookup(self):
+        """校验通过时返回缓存的 chromedriver 路径，否则返回 None"""
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if meta.get('chrome_major') != self.chrome_major or not os.path.isfile(self.driver_path):
+            return None
+        if _sha256(self.driver_path) != meta.get('sha256'):
+            logger.warning('⚠️ chromedriver缓存校验失败，重新打补丁')
+            self.clear()
+            return None
+        return self.driver_path
+
+    def store(self, source_path):
+        """把 undetected_chromedriver 打好补丁的 chromedriver 复制进缓存"""
+        if not source_path or not os.path.isfile(source_path):
+            logger.warning(f'⚠️ 找不到chromedriver，无法写入缓存: {source_path}')
+            return
+        if os.path.abspath(source_path) == os.path.abspath(self.driver_path):
+            return
+
+        # 旧版本的缓存不再需要
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.startswith('chrome-') and name != os.path.basename(self.entry_dir):
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+        os.makedirs(self.entry_dir, exist_ok=True)
+        tmp_path = self.driver_path + '.tmp'
+        shutil.copy2(source_path, tmp_path)
+        os.chmod(tmp_path, 0o755)
+        os.replace(tmp_path, self.driver_path)
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'chrome_major': self.chrome_major, 'sha256': _sha256(self.driver_path)}, f)
+        logger.info(f'💾 chromedriver已写入缓存: {self.driver_path}')
+
+    def clear(self):
+        shutil.rmtree(self.entry_dir, ignore_errors=True)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP预检 - 不启动浏览器，用缓存的会话cookie直接请求续期页面
+解析到期时间/续期按钮状态，判断本次是否需要启动Chrome
+
+也可以对保存下来的HTML文件运行，便于离线验证解析逻辑:
+    python http_probe.py --html tests/fixtures/renew_page.html
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+from datetime import datetime, timedelta, timezone
+from html.parser import HTMLParser
+
+logger = logging.getLogger(__name__)
+
+# 距离到期不足该小时数时视为需要续期
+DEFAULT_RENEW_BEFORE_HOURS = 24
+
+RENEW_BUTTON_CLASSES = {'btn', 'btn-outline-primary'}
+
+# 到期标签，日期必须紧跟在标签之后（中间只允许冒号和 on/at/date 这类连接词），
+# 这样 "Expires in 3 days, created 2024-01-01" 不会把创建日期当成到期时间
+_EXPIRY_LABEL = re.compile(r'(expir\w*|到期\w*)[\s:：]*(?:(?:date|time|on|at|时间|日期)\b[\s:：]*)*', re.IGNORECASE)
+_DATE_PATTERNS = [
+    (re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(?::\d{2})?'), ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M')),
+    (re.compile(r'\d{4}-\d{2}-\d{2}'), ('%Y-%m-%d',)),
+    (re.compile(r'\d{1,2} [A-Z][a-z]+ \d{4}'), ('%d %B %Y', '%d %b %Y')),
+    (re.compile(r'[A-Z][a-z]+ \d{1,2}, \d{4}'), ('%B %d, %Y', '%b %d, %Y')),
+]
+# 相对时间: "Expires in 3 days" / "到期 还有 2 天"
+_RELATIVE = re.compile(r'(?:in|还有)\s*(\d+)\s*(day|hour|minute|天|小时|分钟)', re.IGNORECASE)
+_RELATIVE_UNITS = {'day': 'days', '天': 'days', 'hour': 'hours', '小时': 'hours', 'minute': 'minutes', '分钟': 'minutes'}
+
+
+class ProbeResult:
+    """预检结果: due 为 True/False 表示确定需要/不需要续期，None 表示无法判断"""
+
+    def __init__(self, due, reason, expiry=None):
+        self.due = due
+        self.reason = reason
+        self.expiry = expiry
+
+    def __repr__(self):
+        return f'ProbeResult(due={self.due!r}, reason={self.reason!r}, expiry={self.expiry!r})'
+
+
+class _RenewPageParser(HTMLParser):
+    """收集页面可见文本和续期按钮的状态"""
+
+    def __init__(self):
+        super().__init__()
+        self.text_parts = []
+        self.renew_buttons = []  # 每个按钮是否 disabled
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip_depth += 1
+            return
+        if tag == 'button':
+            attrs = dict(attrs)
+            classes = set((attrs.get('class') or '').split())
+            if RENEW_BUTTON_CLASSES <= classes:
+                self.renew_buttons.append('disabled' in attrs or 'disabled' in classes)
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style') and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth and data.strip():
+            self.text_parts.append(data.strip())
+
+
+def _parse_date(value, formats):
+    value = value.replace('T', ' ')
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def find_expiry(text, now=None):
+    """查找紧跟在到期标签之后的日期或相对时间，返回 UTC datetime 或 None"""
+    now = now or datetime.now(timezone.utc)
+    for label in _EXPIRY_LABEL.finditer(text):
+        position = label.end()
+        for pattern, formats in _DATE_PATTERNS:
+            match = pattern.match(text, position)
+            if match:
+                expiry = _parse_date(match.group(0), formats)
+                if expiry:
+                    return expiry
+        match = _RELATIVE.match(text, position)
+        if match:
+            unit = _RELATIVE_UNITS[match.group(2).lower()]
+            return now + timedelta(**{unit: int(match.group(1))})
+    return None
+
+
+def parse_renew_page(html, now=None, renew_before_hours=DEFAULT_RENEW_BEFORE_HOURS):
+    """解析续期页面HTML，返回 ProbeResult"""
+    now = now or datetime.now(timezone.utc)
+    parser = _RenewPageParser()
+    parser.feed(html)
+    text = ' '.join(parser.text_parts)
+
+    if 'id="password"' in html or "id='password'" in html:
+        return ProbeResult(None, '返回了登录页，会话已失效')
+
+    expiry = find_expiry(text, now)
+    if expiry:
+        hours_left = (expiry - now).total_seconds() / 3600
+        if hours_left > renew_before_hours:
+            return ProbeResult(False, f'距离到期还有 {hours_left:.1f} 小时', expiry)
+        return ProbeResult(True, f'距离到期仅剩 {hours_left:.1f} 小时', expiry)
+
+    if parser.renew_buttons:
+        if all(parser.renew_buttons):
+            return ProbeResult(False, '续期按钮不可用')
+        return ProbeResult(True, '续期按钮可用，未找到到期时间')
+
+    return ProbeResult(None, '未找到到期时间或续期按钮')
+
+
+def probe(url, cookies, user_agent=None, timeout=5, renew_before_hours=DEFAULT_RENEW_BEFORE_HOURS, save_html=None):
+    """请求续期页面并解析，任何网络异常都返回无法判断"""
+    try:
+        import requests
+    except ImportError:
+        return ProbeResult(None, 'requests 未安装')
+
+    session = requests.Session()
+    if user_agent:
+        session.headers['User-Agent'] = user_agent
+    for cookie in cookies:
+        session.cookies.set(cookie['name'], cookie['value'],
+                            domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+
+    start = time.monotonic()
+    try:
+        response = session.get(url, timeout=timeout, allow_redirects=True)
+    except requests.RequestException as e:
+        return ProbeResult(None, f'请求失败: {e}')
+    elapsed = time.monotonic() - start
+    logger.info(f'🌐 HTTP预检: {response.status_code} {response.url} ({elapsed:.2f}秒)')
+
+    if save_html:
+        with open(save_html, 'w', encoding='utf-8') as f:
+            f.write(response.text)
+
+    return classify_response(response.url, response.status_code, response.text, renew_before_hours=renew_before_hours)
+
+
+def classify_response(final_url, status_code, html, now=None, renew_before_hours=DEFAULT_RENEW_BEFORE_HOURS):
+    """根据跟随重定向后的URL、状态码和页面内容得出预检结果"""
+    if '/auth/login' in final_url:
+        return ProbeResult(None, '被重定向到登录页，会话已失效')
+    if status_code != 200:
+        return ProbeResult(None, f'HTTP状态码 {status_code}')
+    return parse_renew_page(html, now=now, renew_before_hours=renew_before_hours)
+
+
+def main():
+    """离线解析: python http_probe.py --html <文件> [--now 2025-01-01T00:00]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='解析保存的续期页面HTML')
+    parser.add_argument('--html', required=True, help='保存的续期页面HTML文件')
+    parser.add_argument('--now', help='当前时间(UTC, ISO格式)，默认为系统时间')
+    parser.add_argument('--renew-before-hours', type=float,
+                        default=float(os.getenv('RENEW_BEFORE_HOURS') or DEFAULT_RENEW_BEFORE_HOURS))
+    args = parser.parse_args()
+
+    with open(args.html, 'r', encoding='utf-8') as f:
+        html = f.read()
+    now = datetime.fromisoformat(args.now).replace(tzinfo=timezone.utc) if args.now else None
+    result = parse_renew_page(html, now=now, renew_before_hours=args.renew_before_hours)
+    print(result)
+    # 退出码: 0 不需要续期, 1 需要续期, 2 无法判断
+    sys.exit({False: 0, True: 1, None: 2}[result.due])
+
+
+if __name__ == '__main__':
+    main()
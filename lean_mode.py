@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精简浏览器 - 拦截不需要的资源（图片、字体、统计脚本等），并记录Chrome进程树内存
+
+LEAN_MODE=1 启用拦截；可用以下变量调整:
+    LEAN_BLOCK_TYPES  以逗号分隔的资源类型（默认 Image,Font,Media）
+    LEAN_BLOCK_URLS   额外拦截的URL模式（CDP通配符，逗号分隔）
+    LEAN_ALLOW_URLS   不拦截的URL片段（逗号分隔），Cloudflare Turnstile 始终不拦截
+SVG不在拦截范围内，Turnstile组件依赖它渲染。
+
+两个后端对 LEAN_ALLOW_URLS 的处理不同:
+    Playwright  按请求判断，URL包含放行片段的请求一律不拦截
+    Selenium    Network.setBlockedURLs 不支持例外，只能剔除本身包含放行片段的拦截模式；
+                *.png* 这类扩展名模式对放行的域名同样生效
+"""
+
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_TYPES = ['Image', 'Font', 'Media']
+# Network.setBlockedURLs 只支持URL模式，资源类型按扩展名映射
+TYPE_PATTERNS = {
+    'Image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.ico*'],
+    'Font': ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*'],
+    'Media': ['*.mp4*', '*.webm*', '*.mp3*', '*.ogg*'],
+    'Stylesheet': ['*.css*'],
+}
+THIRD_PARTY_PATTERNS = [
+    '*google-analytics.com*',
+    '*googletagmanager.com*',
+    '*doubleclick.net*',
+    '*facebook.net*',
+    '*hotjar.com*',
+]
+ALWAYS_ALLOW = ['challenges.cloudflare.com', 'turnstile']
+
+
+def _env_list(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def lean_enabled():
+    return os.getenv('LEAN_MODE', '').lower() in ('1', 'true', 'yes')
+
+
+def apply_lean_options(options):
+    """启动参数层面的精简：关闭后台网络服务（图片按URL模式拦截，不整体禁用）"""
+    options.add_argument('--disable-background-networking')
+    options.add_argument('--disable-component-update')
+    options.add_argument('--disable-sync')
+    options.add_argument('--metrics-recording-only')
+    options.add_argument('--mute-audio')
+
+
+def block_types():
+    return _env_list('LEAN_BLOCK_TYPES', DEFAULT_BLOCK_TYPES)
+
+
+def allowed_fragments():
+    """放行的URL片段（Playwright按请求判断）"""
+    return _env_list('LEAN_ALLOW_URLS', []) + ALWAYS_ALLOW
+
+
+def blocked_patterns():
+    """第三方统计脚本 + 资源类型对应的扩展名 + LEAN_BLOCK_URLS，剔除包含放行片段的模式"""
+    patterns = list(THIRD_PARTY_PATTERNS)
+    for block_type in block_types():
+        patterns += TYPE_PATTERNS.get(block_type, [])
+    patterns += _env_list('LEAN_BLOCK_URLS', [])
+    allow = allowed_fragments()
+    return [p for p in patterns if not any(a in p for a in allow)]
+
+
+def enable_blocking(driver):
+    """通过 Network.setBlockedURLs 按URL模式拦截，返回生效的模式列表（Selenium后端）"""
+    patterns = blocked_patterns()
+    if os.getenv('LEAN_ALLOW_URLS'):
+        logger.info('ℹ️ Selenium后端的 LEAN_ALLOW_URLS 只能剔除包含这些片段的拦截模式，扩展名模式仍会拦截放行域名上的资源')
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    logger.info(f'🪶 精简模式已启用: 拦截 {len(patterns)} 个URL模式，资源类型 {block_types()}')
+    return patterns
+
+
+class MemorySampler:
+    """用psutil统计浏览器进程树（含驱动进程）的RSS，pids 为各进程树的根"""
+
+    def __init__(self, pids):
+        self.samples = {}  # 阶段 -> 最大RSS(MB)
+        self.peak_mb = 0.0
+        self._roots = []
+        try:
+            import psutil
+            self._psutil = psutil
+        except ImportError:
+            self._psutil = None
+            logger.info('ℹ️ psutil 未安装，跳过内存采样')
+        self.track(pids)
+
+    def track(self, pids):
+        """改为跟踪新的进程树（浏览器重启后调用）"""
+        self._roots = []
+        if self._psutil is None:
+            return
+        for pid in pids:
+            try:
+                self._roots.append(self._psutil.Process(pid))
+            except self._psutil.Error as e:
+                logger.warning(f'⚠️ 内存采样初始化失败: {e}')
+
+    def rss_mb(self):
+        """当前进程树RSS总和(MB)"""
+        if not self._roots:
+            return None
+        processes = {}
+        for root in self._roots:
+            try:
+                for process in [root] + root.children(recursive=True):
+                    processes[process.pid] = process
+            except self._psutil.Error:
+                continue
+        if not processes:
+            return None
+        total = 0
+        for process in processes.values():
+            try:
+                total += process.memory_info().rss
+            except self._psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    def sample(self, phase):
+        rss = self.rss_mb()
+        if rss is None:
+            return None
+        self.samples[phase] = round(max(rss, self.samples.get(phase, 0)), 1)
+        self.peak_mb = round(max(self.peak_mb, rss), 1)
+        return rss
+
+    def to_dict(self):
+        return {'peak_rss_mb': self.peak_mb, 'rss_mb_by_phase': self.samples}
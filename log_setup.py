@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志配置 - 处理器放到后台队列线程，自动化线程不会被磁盘写入阻塞
+可选输出JSON-lines结构化日志（带阶段和耗时字段），轮询中的重复日志合并为周期汇总
+
+轮询循环里的日志通过 extra={'poll': '<键>'} 标记，同一个键在
+LOG_POLL_INTERVAL 秒内只输出一次，被合并的条数附在下一条输出中。
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import logging.handlers
+import queue
+from contextvars import ContextVar
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# 当前阶段名，由 RunReport.span 设置
+current_phase = ContextVar('current_phase', default=None)
+
+_listener = None
+_poll_filter = None
+
+
+class PhaseFilter(logging.Filter):
+    """给每条记录加上 phase 字段"""
+
+    def filter(self, record):
+        record.phase = current_phase.get()
+        return True
+
+
+class PollCoalesceFilter(logging.Filter):
+    """同一轮询键在间隔内只放行一条，其余计数后附加到下一条"""
+
+    def __init__(self, interval):
+        super().__init__()
+        self.interval = interval
+        self._state = {}  # 键 -> [上次放行时间, 被合并条数]
+
+    def filter(self, record):
+        key = getattr(record, 'poll', None)
+        if key is None:
+            return True
+
+        now = time.monotonic()
+        state = self._state.get(key)
+        if state and now - state[0] < self.interval:
+            state[1] += 1
+            return False
+
+        suppressed = state[1] if state else 0
+        self._state[key] = [now, 0]
+        if suppressed:
+            record.msg = f'{record.getMessage()} （已合并 {suppressed} 条重复日志）'
+            record.args = None
+        record.coalesced = suppressed
+        return True
+
+    def pending(self):
+        """尚未汇报的被合并条数 {键: 条数}"""
+        return {key: state[1] for key, state in self._state.items() if state[1]}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """每条记录一行JSON"""
+
+    def format(self, record):
+        data = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'phase': getattr(record, 'phase', None),
+            'elapsed_ms': round(record.relativeCreated, 1),
+        }
+        if getattr(record, 'poll', None):
+            data['poll'] = record.poll
+            data['coalesced'] = getattr(record, 'coalesced', 0)
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def setup_logging(level=logging.INFO, log_file='renew.log'):
+    """配置根日志器：QueueHandler -> 后台线程 -> 控制台/文件/JSON-lines"""
+    global _listener, _poll_filter
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout), logging.FileHandler(log_file, encoding='utf-8')]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    json_path = os.getenv('LOG_JSON_PATH')
+    if json_path:
+        json_handler = logging.FileHandler(json_path, encoding='utf-8')
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    _poll_filter = PollCoalesceFilter(float(os.getenv('LOG_POLL_INTERVAL') or 10))
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(PhaseFilter())
+    queue_handler.addFilter(_poll_filter)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """输出未汇报的合并计数并等待队列写完"""
+    global _listener
+    if _listener is None:
+        return
+    pending = _poll_filter.pending() if _poll_filter else {}
+    if pending:
+        summary = ', '.join(f'{key}×{count}' for key, count in pending.items())
+        logging.getLogger(__name__).info(f'📉 轮询日志合并汇总: {summary}')
+    _listener.stop()
+    _listener = None
@@ -5,32 +5,75 @@
 使用pyautogui进行真实的鼠标操作，绕过自动化检测
 """
 
+import sys
+
+import startup_profile
+
+def parse_args():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Katabump 服务器自动续期（配置通过环境变量传入）')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='统计每个导入和初始化步骤的耗时，结束时输出并写入运行报告')
+    return parser.parse_args()
+
+# 先解析参数：--help 和错误参数在创建日志文件之前退出；
+# --profile-startup 在其他导入之前开始计时（类似 python -X importtime）
+if __name__ == '__main__':
+    if parse_args().profile_startup:
+        startup_profile.install()
+
 import os
+import re
 import time
 import asyncio
-import random
-import sys
 from datetime import datetime
+from urllib.parse import urlparse, parse_qs
 import logging
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO, 
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('renew.log', encoding='utf-8')
-    ]
-)
+import log_setup
+import lean_mode
+from browser_backend import USER_AGENT, create_backend
+from deadline import Deadline, DeadlineExceeded
+from pipeline import Pipeline, PhaseFailed, Step
+from run_history import RunHistory, build_record
+from session_store import SessionStore
+from run_report import RunReport
+from screenshots import ScreenshotManager
+
+# 配置日志（后台队列写入，见 log_setup.py）
+with startup_profile.step('setup_logging'):
+    log_setup.setup_logging()
 logger = logging.getLogger(__name__)
 
+def parse_renew_urls(value):
+    """RENEW_URL 可以是逗号、空格或换行分隔的多个服务器URL"""
+    return [url for url in re.split(r'[\s,]+', value) if url]
+
+def server_label(url):
+    """服务器简称：URL中的 id 参数，没有时使用完整URL"""
+    return parse_qs(urlparse(url).query).get('id', [url])[0]
+
 class RealMouseRenewBot:
     def __init__(self):
         # 从环境变量获取配置
         self.email = os.getenv('EMAIL')
         self.password = os.getenv('PASSWORD')
         self.login_url = os.getenv('LOGIN_URL') or 'https://dashboard.katabump.com/auth/login'
-        self.renew_url = os.getenv('RENEW_URL') or 'https://dashboard.katabump.com/servers/edit?id=124653'
+        # 同一账号下配置的一台或多台服务器，登录一次后依次（或并发）续期；
+        # 每次运行实际续期的是预检后仍需要续期的子集，这里的列表保持不变
+        self.renew_urls = parse_renew_urls(os.getenv('RENEW_URL') or 'https://dashboard.katabump.com/servers/edit?id=124653')
+        self.renew_url = self.renew_urls[0]
+        # 多台服务器时同时打开的标签页数量
+        self.concurrency = max(1, int(os.getenv('RENEW_CONCURRENCY') or 2))
+        # 无头模式不需要显示器，Selenium后端点击改用JavaScript（用于本地基准测试）
+        self.headless = os.getenv('HEADLESS', '').lower() in ('1', 'true', 'yes')
+        
+        # 总时限从这里开始计时，每个阶段的预算由 report.span 自动进入
+        self.deadline = Deadline.from_env()
+        self.report = RunReport.from_env()
+        self.report.deadline = self.deadline
+        self.screenshots = ScreenshotManager.from_env()
         
         # 验证配置
         if not self.email or not self.password:
@@ -40,29 +83,31 @@ class RealMouseRenewBot:
         logger.info(f'🚀 开始执行真实鼠标点击续期任务 - {datetime.now()}')
         logger.info(f'📧 邮箱: {self.email[:3]}***{self.email.split("@")[1]}')
         logger.info(f'🔗 登录URL: {self.login_url}')
-        logger.info(f'🔗 续期URL: {self.renew_url}')
+        if len(self.renew_urls) > 1:
+            logger.info(f'🔗 续期URL ({len(self.renew_urls)} 台服务器): {", ".join(self.renew_urls)}')
+        else:
+            logger.info(f'🔗 续期URL: {self.renew_url}')
+        
+        # 会话缓存（设置 SESSION_DIR 后启用）
+        self.session_store = SessionStore.from_env(self.email)
+        if self.session_store:
+            logger.info(f'🍪 会话缓存文件: {self.session_store.path}')
+        
+        # 运行历史（设置 HISTORY_PATH 后启用），记录每台服务器看到的到期时间
+        self.history = RunHistory.from_env()
+        self.expiries = {url: None for url in self.renew_urls}
+        
+        # 守护进程模式下在多次续期之间复用同一个浏览器（见 daemon.py）
+        self.backend = None
+        self.keep_browser = False
+        self.display_ready = False
     
-    def setup_pyautogui(self):
-        """设置pyautogui"""
-        try:
-            import pyautogui
-            
-            # 设置pyautogui参数
-            pyautogui.FAILSAFE = True  # 启用故障安全
-            pyautogui.PAUSE = 0.1  # 每次操作间隔
-            
-            # 检查屏幕尺寸
-            screen_width, screen_height = pyautogui.size()
-            logger.info(f'🖥️ 屏幕尺寸: {screen_width}x{screen_height}')
-            
-            return pyautogui
-            
-        except ImportError:
-            logger.error('❌ pyautogui 未安装，请运行: pip install pyautogui')
-            return None
-        except Exception as e:
-            logger.error(f'❌ 设置pyautogui失败: {e}')
-            return None
+    def new_run(self):
+        """开始新的一次续期：重新计时，换新的运行报告和截图管理器"""
+        self.deadline.restart()
+        self.report = RunReport.from_env()
+        self.report.deadline = self.deadline
+        self.screenshots = ScreenshotManager.from_env()
     
     def setup_virtual_display(self):
         """设置虚拟显示（有头模式）"""
@@ -95,347 +140,347 @@ class RealMouseRenewBot:
             logger.warning(f'⚠️ 设置虚拟显示失败: {e}')
             return False
     
-    async def run_with_real_mouse(self):
-        """使用真实鼠标操作的Selenium方案"""
-        try:
-            import undetected_chromedriver as uc
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-            from selenium.common.exceptions import TimeoutException, NoSuchElementException
+    async def run_with_backend(self, backend=None, urls=None):
+        """用选定的浏览器后端执行登录和续期流程（带检查点的阶段流水线）；urls 默认为全部配置的服务器"""
+        urls = urls or self.renew_urls
+        report = self.report
+        backend = backend or self.backend or create_backend(self)
+        logger.info(f'🧭 浏览器后端: {backend.name}')
+        report.extra['backend'] = backend.name
+        del backend.wait_history[:]
+        # 多台服务器时登录一次，每台服务器在自己的标签页中续期
+        multi = len(urls) > 1
+        results = {}  # URL -> 单台服务器的结果
+        
+        # 每个阶段结束时记录浏览器进程树的内存（浏览器重启后重新跟踪）
+        memory = lean_mode.MemorySampler([])
+        sample_memory = lambda span: span.update(rss_mb=memory.sample(span['name']))
+        # 缓存会话已经打开了续期页，下一个阶段可以直接使用
+        session_page_ready = False
+        # 复用了上一次续期留下的浏览器
+        warm = False
+        
+        async def browser_up():
+            nonlocal warm
+            if self.keep_browser and await backend.alive():
+                warm = True
+                logger.info('♨️ 复用已启动的浏览器')
+            else:
+                with startup_profile.step('browser_start'):
+                    if not await backend.start():
+                        raise PhaseFailed('浏览器启动失败')
+            memory.track(backend.process_ids())
+        
+        async def logged_in():
+            nonlocal session_page_ready
+            startup_profile.mark('first_action')
+            if warm:
+                # 浏览器里的会话通常仍然有效
+                with report.span('renew_page_load') as span:
+                    logger.info('🌐 使用浏览器中的会话访问续期页面...')
+                    if await backend.open_renew_page(urls[0]):
+                        logger.info('✅ 会话仍然有效，跳过登录！')
+                        session_page_ready = True
+                        return
+                    span['outcome'] = 'session_expired'
             
-            # 设置虚拟显示
-            if not self.setup_virtual_display():
-                logger.error('❌ 虚拟显示设置失败')
-                return False
+            # 优先使用缓存会话直接访问续期页面
+            cookies = self.session_store.load() if self.session_store else None
+            if cookies and await backend.add_cookies(cookies):
+                with report.span('renew_page_load') as span:
+                    logger.info('🌐 使用缓存会话访问续期页面...')
+                    if await backend.open_renew_page(urls[0]):
+                        logger.info('✅ 缓存会话有效，跳过登录！')
+                        session_page_ready = True
+                        return
+                    span['outcome'] = 'session_expired'
+                    logger.info('ℹ️ 缓存会话已失效，回退到登录流程')
+                    self.session_store.invalidate()
             
-            # 设置pyautogui
-            pyautogui = self.setup_pyautogui()
-            if not pyautogui:
-                logger.error('❌ pyautogui设置失败')
-                return False
+            if not await backend.login():
+                raise PhaseFailed('登录失败')
             
-            logger.info('🔧 初始化有头模式Chrome...')
+            logger.info('✅ 登录成功！')
+            if self.session_store:
+                try:
+                    self.session_store.save(await backend.get_cookies())
+                except Exception as e:
+                    logger.warning(f'⚠️ 保存会话缓存失败: {e}')
+        
+        def on_failure(suffix=''):
+            async def capture(step, error, attempt):
+                with report.span('screenshot'):
+                    await backend.capture(f'{step}_failed{suffix}_{attempt}')
+            return capture
+        
+        def server_steps(url):
+            """单台服务器的页面级阶段：打开续期页、点击续期、完成验证"""
+            label = server_label(url)
+            fields = {'server': label} if multi else {}
+            suffix = f'_{label}' if multi else ''
             
-            options = uc.ChromeOptions()
+            async def on_renew_page():
+                nonlocal session_page_ready
+                # 缓存会话已经停在续期页时无需重新加载（重试时总是重新加载）
+                if not session_page_ready:
+                    with report.span('renew_page_load', **fields):
+                        logger.info(f'🌐 访问续期页面... {url}' if multi else '🌐 访问续期页面...')
+                        if not await backend.open_renew_page(url):
+                            raise PhaseFailed('被重定向到登录页，会话已失效', rollback_to='logged_in')
+                session_page_ready = False
+                await backend.capture(f'renew_page{suffix}')
             
-            # 关键：不使用headless模式！
-            # options.add_argument('--headless')  # 注释掉这行
+            async def renew_clicked():
+                with report.span('renew_click', **fields):
+                    await backend.click_renew()
+                    await backend.capture(f'renew_clicked{suffix}')
             
-            # 基本设置
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--window-size=1366,768')
-            options.add_argument('--window-position=0,0')
+            async def verified():
+                with report.span('verification_wait', **fields) as span:
+                    success = await backend.verify()
+                    
+                    if success:
+                        logger.info('🎉 Turnstile验证成功！')
+                    else:
+                        span['outcome'] = 'unverified'
+                        logger.warning('⚠️ Turnstile验证可能未完成，但继续执行')
+                    
+                    # 等待最终完成：续期请求发送完毕
+                    await backend.settle()
             
-            # 反检测设置
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_argument('--disable-extensions')
-            options.add_argument('--no-first-run')
-            options.add_argument('--disable-default-apps')
+            return [
+                Step('on_renew_page', on_renew_page),
+                Step('renew_clicked', renew_clicked),
+                Step('verified', verified),
+            ]
+        
+        async def renew_server(url, semaphore):
+            """在新标签页中续期一台服务器；失败的服务器由外层 servers_renewed 阶段统一重试，
+            这样每台服务器最多尝试 RETRY_LIMIT+1 次"""
+            label = server_label(url)
+            result = results[url] = {'server': label, 'url': url, 'success': False}
+            async with semaphore:
+                logger.info(f'🖥️ [{label}] 开始续期')
+                start = time.monotonic()
+                server_pipeline = Pipeline(server_steps(url), retries=0, deadline=self.deadline,
+                                           on_failure=on_failure(f'_{label}'))
+                try:
+                    async with backend.tab():
+                        result['success'] = await server_pipeline.run()
+                except Exception as e:
+                    result['error'] = f'{type(e).__name__}: {e}'
+                    raise
+                finally:
+                    result['duration_ms'] = round((time.monotonic() - start) * 1000, 1)
+                    result['checkpoints'] = server_pipeline.history
+            logger.info(f'{"✅" if result["success"] else "❌"} [{label}] 续期{"完成" if result["success"] else "失败"}，'
+                        f'用时 {result["duration_ms"] / 1000:.1f}秒')
+        
+        async def servers_renewed():
+            nonlocal session_page_ready
+            # 每台服务器都在自己的标签页中打开续期页
+            session_page_ready = False
+            # 重试时只处理还没成功的服务器
+            pending = [url for url in urls if not results.get(url, {}).get('success')]
+            limit = min(self.concurrency, backend.max_tabs or self.concurrency)
+            logger.info(f'🗂️ {len(pending)} 台服务器待续期，同时打开 {limit} 个标签页')
+            semaphore = asyncio.Semaphore(limit)
+            outcomes = await asyncio.gather(*(renew_server(url, semaphore) for url in pending), return_exceptions=True)
             
-            # 用户代理
-            ua = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            options.add_argument(f'--user-agent={ua}')
+            # 超时、缺少依赖、会话失效需要交给外层流水线处理
+            for outcome in outcomes:
+                if isinstance(outcome, Pipeline.FATAL) or (isinstance(outcome, PhaseFailed) and outcome.rollback_to):
+                    raise outcome
+            failed = [results[url]['server'] for url in pending if not results[url]['success']]
+            if failed:
+                raise PhaseFailed(f'{len(failed)} 台服务器续期失败: {", ".join(failed)}')
+        
+        if multi:
+            steps = [Step('servers_renewed', servers_renewed)]
+        else:
+            steps = server_steps(urls[0])
+        pipeline = Pipeline.from_env(
+            [
+                Step('browser_up', browser_up, durable=True),
+                Step('logged_in', logged_in, durable=True),
+                *steps,
+            ],
+            deadline=self.deadline,
+            health_check=backend.alive,
+            reset=backend.close,
+            on_failure=on_failure(),
+        )
+        
+        report.listeners.append(sample_memory)
+        try:
+            if not self.headless and not self.display_ready:
+                # 设置虚拟显示
+                with report.span('virtual_display') as span:
+                    if not self.setup_virtual_display():
+                        span['outcome'] = 'failed'
+                        logger.error('❌ 虚拟显示设置失败')
+                        return False
+                self.display_ready = True
             
-            # GitHub Actions环境特殊设置
-            if os.getenv('GITHUB_ACTIONS'):
-                options.add_argument('--display=:99')
-                options.add_argument('--no-xshm')  # 禁用共享内存
+            if not await pipeline.run():
+                return False
             
-            driver = uc.Chrome(
-                options=options, 
-                version_main=None,
-                use_subprocess=True
-            )
+            # 预检读到的是续期前的到期时间，续期后只记录重新读到的日期
+            for url in urls:
+                self.expiries[url] = None
+            if self.history:
+                with report.span('expiry_check'):
+                    await self.check_expiry(backend, urls)
             
-            wait = WebDriverWait(driver, 30)
+            if not multi:
+                # 最终截图（on-failure 策略下只保留在内存中）
+                with report.span('screenshot'):
+                    await backend.capture('final')
+            total_waited = sum(elapsed for _, elapsed, _ in backend.wait_history)
+            logger.info(f'⏱️ 条件等待累计用时 {total_waited:.2f}秒')
+            logger.info('✅ 真实鼠标方案执行完成！')
+            return True
             
-            try:
-                # 等待浏览器完全加载
-                time.sleep(3)
-                
-                # 最大化窗口确保元素可见
-                try:
-                    driver.maximize_window()
-                    logger.info('✅ 浏览器窗口已最大化')
-                except:
-                    logger.info('ℹ️ 窗口最大化失败，继续执行')
-                
-                # 登录流程
-                logger.info('🌐 访问登录页面...')
-                driver.get(self.login_url)
-                time.sleep(3)
-                
-                # 输入登录信息
-                email_field = wait.until(EC.element_to_be_clickable((By.ID, 'email')))
-                password_field = driver.find_element(By.ID, 'password')
-                login_btn = driver.find_element(By.ID, 'submit')
-                
-                # 使用真实的键盘输入（可选）
-                logger.info('⌨️ 输入登录信息...')
-                email_field.clear()
-                email_field.send_keys(self.email)
-                time.sleep(1)
-                
-                password_field.clear()
-                password_field.send_keys(self.password)
-                time.sleep(1)
-                
-                # 使用真实鼠标点击登录按钮
-                logger.info('🖱️ 使用真实鼠标点击登录按钮...')
-                self.real_mouse_click(driver, login_btn, pyautogui)
-                
-                # 等待登录完成
-                time.sleep(5)
-                
-                if 'dashboard' not in driver.current_url:
-                    logger.error(f'❌ 登录失败，当前URL: {driver.current_url}')
-                    driver.save_screenshot('/tmp/real_mouse_login_failed.png')
-                    return False
-                
-                logger.info('✅ 登录成功！')
-                
-                # 续期流程
-                logger.info('🌐 访问续期页面...')
-                driver.get(self.renew_url)
-                time.sleep(3)
-                
-                # 查找续期按钮
-                renew_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, 'button.btn.btn-outline-primary')))
-                
-                # 使用真实鼠标点击续期按钮
-                logger.info('🖱️ 使用真实鼠标点击续期按钮...')
-                self.real_mouse_click(driver, renew_btn, pyautogui)
-                
-                # 等待Turnstile加载
-                time.sleep(5)
-                
-                # 处理Turnstile验证
-                logger.info('🔐 开始使用真实鼠标处理Turnstile验证...')
-                success = await self.handle_turnstile_with_real_mouse(driver, pyautogui)
-                
-                if success:
-                    logger.info('🎉 Turnstile验证成功！')
-                else:
-                    logger.warning('⚠️ Turnstile验证可能未完成，但继续执行')
-                
-                # 等待最终完成
-                time.sleep(5)
-                
-                # 保存最终截图
-                driver.save_screenshot('/tmp/real_mouse_final.png')
-                logger.info('✅ 真实鼠标方案执行完成！')
-                return True
-                
-            except Exception as e:
-                logger.error(f'❌ 真实鼠标方案执行出错: {e}')
-                driver.save_screenshot('/tmp/real_mouse_error.png')
-                return False
-            finally:
-                driver.quit()
-                
+        except DeadlineExceeded as e:
+            logger.error(f'⏰ 超出运行时限，停止执行: {e}')
+            with report.span('screenshot'):
+                await backend.capture('deadline')
+            return False
         except ImportError as e:
             logger.error(f'❌ 导入错误: {e}')
-            logger.error('请安装所需依赖: pip install undetected-chromedriver pyautogui pillow')
+            logger.error(f'请安装所需依赖: {backend.install_hint}')
             return False
         except Exception as e:
-            logger.error(f'❌ 真实鼠标方案初始化失败: {e}')
+            logger.error(f'❌ 真实鼠标方案执行出错: {e}')
             return False
+        finally:
+            report.extra['checkpoints'] = pipeline.history
+            if multi:
+                report.extra['servers'] = [results.get(url, {'server': server_label(url), 'url': url, 'success': False})
+                                           for url in urls]
+                done = sum(1 for item in report.extra['servers'] if item['success'])
+                logger.info(f'🗂️ 服务器续期结果: {done}/{len(urls)} 成功')
+            report.extra['waits'] = [
+                {'desc': desc, 'elapsed_ms': round(elapsed * 1000, 1), 'satisfied': satisfied}
+                for desc, elapsed, satisfied in backend.wait_history
+            ]
+            if backend.waterfall is not None:
+                report.extra['waterfall'] = backend.write_waterfall()
+            if self.keep_browser:
+                logger.info('♨️ 保留浏览器供下一次续期使用')
+            else:
+                with report.span('driver_quit'):
+                    try:
+                        await backend.close()
+                    except Exception as e:
+                        logger.warning(f'⚠️ 关闭浏览器失败: {e}')
+            report.listeners.remove(sample_memory)
+            report.extra['memory'] = memory.to_dict()
+            report.extra['lean_mode'] = lean_mode.lean_enabled()
+            report.extra['deadline'] = self.deadline.to_dict()
+            if backend.blocked_url_patterns is not None:
+                report.extra['blocked_url_patterns'] = backend.blocked_url_patterns
+            logger.info(f'🧠 浏览器进程树峰值内存: {memory.peak_mb:.0f}MB')
     
-    def real_mouse_click(self, driver, element, pyautogui):
-        """使用真实鼠标点击元素"""
-        try:
-            # 滚动到元素位置
-            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-            time.sleep(0.5)
-            
-            # 获取元素位置
-            location = element.location_once_scrolled_into_view
-            size = element.size
-            
-            # 计算点击位置（元素中心）
-            click_x = location['x'] + size['width'] // 2
-            click_y = location['y'] + size['height'] // 2
-            
-            logger.info(f'🎯 元素位置: ({location["x"]}, {location["y"]}), 尺寸: ({size["width"]}, {size["height"]})')
-            logger.info(f'🖱️ 真实鼠标点击位置: ({click_x}, {click_y})')
-            
-            # 使用pyautogui进行真实鼠标点击
-            pyautogui.click(click_x, click_y, duration=0.2)
-            logger.info('✅ 真实鼠标点击完成')
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f'❌ 真实鼠标点击失败: {e}')
-            
-            # 备用方案：JavaScript点击
-            try:
-                driver.execute_script("arguments[0].click();", element)
-                logger.info('✅ 备用JavaScript点击完成')
-                return True
-            except Exception as e2:
-                logger.error(f'❌ JavaScript点击也失败: {e2}')
-                return False
-    
-    async def handle_turnstile_with_real_mouse(self, driver, pyautogui):
-        """使用真实鼠标处理Turnstile验证"""
-        max_wait_time = 90
-        start_time = time.time()
+    def http_precheck(self):
+        """不启动浏览器，用缓存会话判断是否需要续期
+
+        返回 (due, urls)：due 为 True/False/None(无法判断)，urls 为需要（或无法判断是否需要）续期的服务器
+        """
+        if os.getenv('HTTP_PRECHECK', 'true').lower() in ('0', 'false', 'no'):
+            return None, self.renew_urls
+        if not self.session_store:
+            return None, self.renew_urls
+        cookies = self.session_store.load()
+        if not cookies:
+            logger.info('ℹ️ 没有可用的会话缓存，跳过HTTP预检')
+            return None, self.renew_urls
         
-        logger.info('🔍 寻找Turnstile验证框...')
+        import http_probe
         
-        while time.time() - start_time < max_wait_time:
+        multi = len(self.renew_urls) > 1
+        dues = {}
+        for url in self.renew_urls:
             try:
-                # 检查是否已经完成验证
-                if self.check_turnstile_completion(driver):
-                    logger.info('✅ Turnstile验证已完成！')
-                    return True
-                
-                # 查找所有iframe
-                iframes = driver.find_elements(By.TAG_NAME, 'iframe')
-                logger.info(f'🔍 找到 {len(iframes)} 个iframe')
-                
-                for i, iframe in enumerate(iframes):
-                    try:
-                        src = iframe.get_attribute('src') or ''
-                        logger.info(f'iframe {i+1}: {src}')
-                        
-                        # 检查是否是Turnstile iframe
-                        if any(keyword in src.lower() for keyword in ['challenges.cloudflare.com', 'turnstile']):
-                            logger.info(f'🎯 发现Turnstile iframe {i+1}')
-                            
-                            # 切换到iframe
-                            driver.switch_to.frame(iframe)
-                            
-                            # 查找checkbox
-                            checkbox_selectors = [
-                                'input[type="checkbox"]',
-                                '[role="checkbox"]',
-                                '.cb-i',
-                                'span[role="checkbox"]',
-                                'div[role="checkbox"]'
-                            ]
-                            
-                            for selector in checkbox_selectors:
-                                try:
-                                    checkboxes = driver.find_elements(By.CSS_SELECTOR, selector)
-                                    logger.info(f'选择器 {selector} 找到 {len(checkboxes)} 个元素')
-                                    
-                                    for j, checkbox in enumerate(checkboxes):
-                                        try:
-                                            if checkbox.is_displayed():
-                                                logger.info(f'🖱️ 尝试真实鼠标点击复选框 {j+1}')
-                                                
-                                                # 获取iframe在页面中的位置
-                                                iframe_rect = driver.execute_script("""
-                                                    return arguments[0].getBoundingClientRect();
-                                                """, iframe)
-                                                
-                                                # 获取checkbox在iframe中的位置
-                                                checkbox_rect = driver.execute_script("""
-                                                    return arguments[0].getBoundingClientRect();
-                                                """, checkbox)
-                                                
-                                                # 计算checkbox在整个页面中的绝对位置
-                                                absolute_x = iframe_rect['x'] + checkbox_rect['x'] + checkbox_rect['width'] // 2
-                                                absolute_y = iframe_rect['y'] + checkbox_rect['y'] + checkbox_rect['height'] // 2
-                                                
-                                                logger.info(f'🎯 Turnstile复选框绝对位置: ({absolute_x}, {absolute_y})')
-                                                
-                                                # 使用真实鼠标点击
-                                                pyautogui.click(absolute_x, absolute_y, duration=0.3)
-                                                logger.info('✅ 已使用真实鼠标点击Turnstile复选框')
-                                                
-                                                # 等待验证处理
-                                                time.sleep(3)
-                                                
-                                                driver.switch_to.default_content()
-                                                
-                                                # 检查验证是否完成
-                                                if self.check_turnstile_completion(driver):
-                                                    logger.info('🎉 Turnstile验证成功完成！')
-                                                    return True
-                                                
-                                                # 重新进入iframe继续尝试
-                                                driver.switch_to.frame(iframe)
-                                                
-                                        except Exception as e:
-                                            logger.warning(f'处理复选框 {j+1} 失败: {e}')
-                                            
-                                except Exception as e:
-                                    logger.warning(f'查找选择器 {selector} 失败: {e}')
-                            
-                            driver.switch_to.default_content()
-                            
-                    except Exception as e:
-                        logger.warning(f'处理iframe {i+1} 失败: {e}')
-                        driver.switch_to.default_content()
-                
-                # 如果iframe方法失败，尝试主页面元素
-                logger.info('🔍 尝试在主页面查找Turnstile元素...')
-                main_selectors = [
-                    '[data-sitekey]',
-                    '.cf-turnstile',
-                    '[id*="turnstile"]',
-                    '[class*="turnstile"]'
-                ]
-                
-                for selector in main_selectors:
-                    try:
-                        elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                        if elements:
-                            logger.info(f'主页面找到 {len(elements)} 个 {selector} 元素')
-                            
-                            for element in elements:
-                                if element.is_displayed():
-                                    logger.info('🖱️ 尝试真实鼠标点击主页面Turnstile元素')
-                                    
-                                    if self.real_mouse_click(driver, element, pyautogui):
-                                        time.sleep(3)
-                                        if self.check_turnstile_completion(driver):
-                                            logger.info('🎉 主页面Turnstile验证成功！')
-                                            return True
-                                    
-                    except Exception as e:
-                        logger.warning(f'处理主页面选择器 {selector} 失败: {e}')
-                
-                # 等待一段时间再重试
-                elapsed = int(time.time() - start_time)
-                if elapsed % 10 == 0:
-                    logger.info(f'⏳ 真实鼠标Turnstile验证等待中... ({elapsed}/{max_wait_time}秒)')
-                
-                time.sleep(2)
-                
-            except Exception as e:
-                logger.warning(f'⚠️ 真实鼠标Turnstile处理异常: {e}')
-                time.sleep(2)
+                timeout = self.deadline.clamp(float(os.getenv('HTTP_PRECHECK_TIMEOUT') or 5))
+            except DeadlineExceeded:
+                # 预检时间用完，剩下的服务器交给浏览器判断
+                logger.info('ℹ️ HTTP预检时间已用完，剩余服务器不再预检')
+                break
+            result = http_probe.probe(
+                url,
+                cookies,
+                user_agent=USER_AGENT,
+                timeout=timeout,
+                renew_before_hours=float(os.getenv('RENEW_BEFORE_HOURS') or http_probe.DEFAULT_RENEW_BEFORE_HOURS),
+                save_html=os.getenv('HTTP_PRECHECK_SAVE_HTML'),
+            )
+            prefix = f' [{server_label(url)}]' if multi else ''
+            logger.info(f'🔎 HTTP预检结果{prefix}: {result.reason}' + (f'，到期时间 {result.expiry}' if result.expiry else ''))
+            dues[url] = result.due
+            if result.expiry:
+                self.expiries[url] = result.expiry
         
-        logger.warning('⚠️ 真实鼠标Turnstile验证超时')
-        return False
+        remaining = [url for url in self.renew_urls if dues.get(url) is not False]
+        if not remaining:
+            return False, []
+        if len(remaining) < len(self.renew_urls):
+            # 只续期需要（或无法判断）的服务器
+            logger.info(f'ℹ️ {len(self.renew_urls) - len(remaining)} 台服务器暂不需要续期')
+        if any(dues.get(url) for url in remaining):
+            return True, remaining
+        return None, remaining
     
-    def check_turnstile_completion(self, driver):
-        """检查Turnstile是否已完成"""
-        try:
-            token_element = driver.find_element(By.NAME, 'cf-turnstile-response')
-            token_value = token_element.get_attribute('value')
-            
-            if token_value and len(token_value) > 10:
-                logger.info(f'✅ 检测到Turnstile token: {token_value[:20]}...')
-                return True
-                
-        except:
-            pass
+    async def check_expiry(self, backend, urls):
+        """续期完成后用浏览器的cookie请求续期页面，记录新的到期时间；失败不影响本次结果"""
+        import http_probe
         
-        return False
+        try:
+            cookies = await backend.get_cookies()
+            for url in urls:
+                result = http_probe.probe(
+                    url,
+                    cookies,
+                    user_agent=USER_AGENT,
+                    timeout=self.deadline.clamp(float(os.getenv('HTTP_PRECHECK_TIMEOUT') or 5)),
+                )
+                if result.expiry:
+                    self.expiries[url] = result.expiry
+                    logger.info(f'📅 [{server_label(url)}] 到期时间: {result.expiry}')
+                else:
+                    logger.info(f'ℹ️ [{server_label(url)}] 未能读取到期时间: {result.reason}')
+        except Exception as e:
+            logger.warning(f'⚠️ 读取到期时间失败: {e}')
+    
+    def finish(self, success, skipped=False):
+        """写出运行报告，并把本次运行追加到运行历史"""
+        if startup_profile.enabled():
+            self.report.extra['startup'] = startup_profile.log_summary()
+        data = self.report.write(success=success)
+        if not self.history:
+            return
+        try:
+            self.history.append(build_record(data, self.expiries, skipped))
+        except OSError as e:
+            logger.warning(f'⚠️ 运行历史保存失败: {e}')
     
     async def run(self):
         """主执行函数"""
+        with self.report.span('http_precheck') as span:
+            due, urls = self.http_precheck()
+            if due is None:
+                span['outcome'] = 'skipped' if not self.session_store else 'undecided'
+        if due is False:
+            logger.info('✅ 暂不需要续期，跳过浏览器启动')
+            self.finish(True, skipped=True)
+            return True
+        
         logger.info('🚀 开始真实鼠标点击方案')
         
-        success = await self.run_with_real_mouse()
+        success = await self.run_with_backend(urls=urls)
+        with self.report.span('screenshot_flush'):
+            self.report.extra['screenshots'] = self.screenshots.close(failed=not success)
+        self.finish(success)
         
         if success:
             logger.info('🎉 真实鼠标方案执行成功！')
@@ -447,7 +492,8 @@ class RealMouseRenewBot:
 async def main():
     """程序入口"""
     try:
-        bot = RealMouseRenewBot()
+        with startup_profile.step('bot_init'):
+            bot = RealMouseRenewBot()
         success = await bot.run()
         
         if success:
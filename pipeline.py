@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+阶段流水线 - 续期流程拆成带检查点的命名阶段，失败后按指数退避从最近的有效检查点重试
+浏览器和登录会话在重试之间尽量复用，临时性失败只需几秒而不是整次重跑
+
+    RETRY_LIMIT         最多重试次数（默认2）
+    RETRY_BACKOFF       首次重试前等待秒数，之后每次翻倍（默认2）
+    RETRY_BACKOFF_MAX   单次等待上限（默认30）
+"""
+
+import os
+import time
+import asyncio
+import logging
+
+from deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseFailed(Exception):
+    """阶段没有达成目标；rollback_to 指定需要回退到的检查点（该检查点将被重新建立）
+
+    rollback_to 不在本流水线中时（例如标签页内的子流水线要求重新登录）异常继续向外抛出。
+    """
+
+    def __init__(self, message, rollback_to=None):
+        super().__init__(message)
+        self.rollback_to = rollback_to
+
+
+class Step:
+    """一个阶段：成功执行后记录同名检查点
+
+    durable 为真的检查点（浏览器已启动、已登录）在后续阶段失败时保留；
+    页面级检查点（在续期页、已点击）会随后续失败一起作废，重试时重新建立。
+    """
+
+    def __init__(self, name, action, durable=False):
+        self.name = name
+        self.action = action
+        self.durable = durable
+
+
+class Pipeline:
+    """按顺序执行阶段，失败时从最近的有效检查点重试"""
+
+    # 这些错误重试也无济于事
+    FATAL = (DeadlineExceeded, ImportError)
+
+    def __init__(self, steps, retries=2, backoff=2.0, backoff_max=30.0, deadline=None,
+                 health_check=None, reset=None, on_failure=None):
+        self.steps = steps
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        # health_check() 返回假时（浏览器已崩溃）丢弃全部检查点，先调用 reset() 清理
+        self.health_check = health_check
+        self.reset = reset
+        # on_failure(阶段名, 异常, 第几次尝试)，用于截图等诊断
+        self.on_failure = on_failure
+        self.checkpoints = []  # 已达成的检查点名
+        self.history = []  # 检查点和重试记录，写入运行报告
+        self._start = time.monotonic()
+
+    @classmethod
+    def from_env(cls, steps, **kwargs):
+        return cls(
+            steps,
+            retries=int(os.getenv('RETRY_LIMIT') or 2),
+            backoff=float(os.getenv('RETRY_BACKOFF') or 2),
+            backoff_max=float(os.getenv('RETRY_BACKOFF_MAX') or 30),
+            **kwargs,
+        )
+
+    def _record(self, event, step, **fields):
+        self.history.append({
+            'event': event,
+            'step': step,
+            'at_ms': round((time.monotonic() - self._start) * 1000, 1),
+            **fields,
+        })
+
+    def _index(self, name):
+        return next(i for i, step in enumerate(self.steps) if step.name == name)
+
+    async def _resume_index(self, failed_index, error):
+        """计算重试起点，并丢弃之后的检查点"""
+        if self.health_check is not None and not await self.health_check():
+            logger.warning('⚠️ 浏览器已不可用，从头开始')
+            if self.reset is not None:
+                try:
+                    await self.reset()
+                except Exception as e:
+                    logger.warning(f'⚠️ 清理浏览器失败: {e}')
+            resume = 0
+        elif isinstance(error, PhaseFailed) and error.rollback_to:
+            resume = self._index(error.rollback_to)
+        else:
+            # 回到失败阶段之前最后一个持久检查点之后
+            resume = failed_index
+            while resume > 0 and not self.steps[resume - 1].durable:
+                resume -= 1
+        kept = {step.name for step in self.steps[:resume]}
+        self.checkpoints = [name for name in self.checkpoints if name in kept]
+        return resume
+
+    async def run(self):
+        """执行全部阶段，全部达成返回 True；致命错误直接抛出"""
+        names = {step.name for step in self.steps}
+        index = 0
+        attempt = 1
+        while index < len(self.steps):
+            step = self.steps[index]
+            try:
+                await step.action()
+            except self.FATAL:
+                self._record('fatal', step.name, attempt=attempt)
+                raise
+            except Exception as e:
+                if isinstance(e, PhaseFailed) and e.rollback_to and e.rollback_to not in names:
+                    # 需要回退到外层流水线的检查点
+                    self._record('escalated', step.name, attempt=attempt, error=str(e))
+                    raise
+                self._record('failed', step.name, attempt=attempt, error=f'{type(e).__name__}: {e}')
+                logger.error(f'❌ 阶段 {step.name} 失败 (第{attempt}次尝试): {e}')
+                if self.on_failure is not None:
+                    try:
+                        await self.on_failure(step.name, e, attempt)
+                    except Exception as diag_error:
+                        logger.warning(f'⚠️ 收集诊断信息失败: {diag_error}')
+                if attempt > self.retries:
+                    logger.error(f'💥 已重试 {self.retries} 次，放弃')
+                    return False
+
+                delay = min(self.backoff * 2 ** (attempt - 1), self.backoff_max)
+                if self.deadline is not None:
+                    delay = min(delay, max(self.deadline.remaining(), 0))
+                index = await self._resume_index(index, e)
+                resume_from = self.checkpoints[-1] if self.checkpoints else '起点'
+                logger.info(f'🔁 {delay:.1f}秒后从检查点 [{resume_from}] 重试 (第{attempt}/{self.retries}次)')
+                self._record('retry', self.steps[index].name, attempt=attempt, backoff_s=round(delay, 2))
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            self.checkpoints.append(step.name)
+            self._record('checkpoint', step.name, attempt=attempt)
+            logger.info(f'📍 检查点: {step.name}')
+            index += 1
+        return True
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Playwright后端 - 单个持久化浏览器上下文，通过一条长连接驱动浏览器
+依赖Playwright自带的自动等待，不需要逐个轮询元素
+"""
+
+import os
+import time
+import fnmatch
+import asyncio
+import shutil
+import logging
+import tempfile
+
+import lean_mode
+from browser_backend import BrowserBackend, USER_AGENT, RENEW_BUTTON_SELECTOR, current_tab
+from waterfall import Waterfall, EVENTS as WATERFALL_EVENTS
+
+logger = logging.getLogger(__name__)
+
+TURNSTILE_FRAME = 'challenges.cloudflare.com'
+TOKEN_JS = "() => { const el = document.querySelector('[name=\"cf-turnstile-response\"]'); return el && el.value && el.value.length > 10; }"
+
+
+class PlaywrightBackend(BrowserBackend):
+    name = 'playwright'
+    install_hint = 'pip install playwright && playwright install chromium'
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        self._playwright = None
+        self.context = None
+        self.main_page = None
+        # 自动创建的临时用户目录，关闭时删除
+        self._temp_profile = None
+
+    @property
+    def page(self):
+        """当前协程的标签页（见 BrowserBackend.tab）"""
+        return current_tab.get() or self.main_page
+
+    async def _timed(self, desc, awaitable, required=True):
+        """记录等待时长，与 waits.Waiter 的记录格式一致"""
+        start = time.monotonic()
+        try:
+            result = await awaitable
+            satisfied = True
+            return result
+        except Exception:
+            satisfied = False
+            if required:
+                raise
+            logger.warning(f'⚠️ 等待 {desc} 超时')
+            return None
+        finally:
+            elapsed = time.monotonic() - start
+            self.wait_history.append((desc, elapsed, satisfied))
+            if satisfied:
+                logger.info(f'⏱️ 等待 {desc} 完成，用时 {elapsed:.2f}秒')
+
+    def _budget_ms(self, seconds):
+        """超时截断到剩余时间内（毫秒）；时间用完时抛出 DeadlineExceeded"""
+        return max(1, self.bot.deadline.clamp(seconds)) * 1000
+
+    async def start(self):
+        """启动持久化上下文；PLAYWRIGHT_USER_DATA_DIR 未设置时使用临时目录"""
+        report = self.report
+        headless = self.bot.headless
+
+        with report.span('imports'):
+            from playwright.async_api import async_playwright
+
+        logger.info('🔧 初始化' + ('无头' if headless else '有头') + '模式Chromium (Playwright)...')
+
+        with report.span('browser_launch'):
+            user_data_dir = os.getenv('PLAYWRIGHT_USER_DATA_DIR')
+            if user_data_dir:
+                user_data_dir = os.path.expanduser(user_data_dir)
+            else:
+                user_data_dir = self._temp_profile = tempfile.mkdtemp(prefix='kb_playwright_')
+
+            args = [
+                '--no-sandbox',
+                '--disable-dev-shm-usage',
+                '--disable-blink-features=AutomationControlled',
+                '--no-first-run',
+                '--disable-default-apps',
+            ]
+            if lean_mode.lean_enabled():
+                args += ['--disable-background-networking', '--disable-component-update', '--disable-sync']
+
+            self._playwright = await async_playwright().start()
+            self.context = await self._playwright.chromium.launch_persistent_context(
+                user_data_dir,
+                headless=headless,
+                args=args,
+                user_agent=USER_AGENT,
+                viewport={'width': 1366, 'height': 768},
+            )
+            self.context.set_default_timeout(30000)
+            self.main_page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+
+            if lean_mode.lean_enabled():
+                await self._enable_blocking()
+
+            waterfall = Waterfall.from_env()
+            if waterfall:
+                await self._enable_waterfall(waterfall)
+
+        return True
+
+    async def _enable_waterfall(self, waterfall):
+        """通过主标签页的CDP会话订阅 Network/Page 事件"""
+        cdp = await self.context.new_cdp_session(self.main_page)
+        await cdp.send('Network.enable')
+        await cdp.send('Page.enable')
+        for event in WATERFALL_EVENTS:
+            cdp.on(event, lambda params, method=event: waterfall.add_event(method, params))
+        self.waterfall = waterfall
+
+    async def _enable_blocking(self):
+        """Playwright可以按资源类型真正拦截请求"""
+        block_types = {t.lower() for t in lean_mode.block_types()}
+        patterns = lean_mode.blocked_patterns()
+        allow = lean_mode.allowed_fragments()
+
+        async def handle(route):
+            request = route.request
+            url = request.url
+            if not any(a in url for a in allow) and (
+                    request.resource_type in block_types or any(fnmatch.fnmatch(url, p) for p in patterns)):
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await self.context.route('**/*', handle)
+        self.blocked_url_patterns = patterns
+        logger.info(f'🪶 精简模式已启用: 拦截资源类型 {sorted(block_types)}，{len(patterns)} 个URL模式')
+
+    async def close(self):
+        if self.context is not None:
+            await self.context.close()
+            self.context = None
+            self.main_page = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        if self._temp_profile is not None:
+            shutil.rmtree(self._temp_profile, ignore_errors=True)
+            self._temp_profile = None
+
+    async def alive(self):
+        if self.context is None or self.main_page is None or self.main_page.is_closed():
+            return False
+        try:
+            await self.main_page.evaluate('1')
+            return True
+        except Exception:
+            return False
+
+    async def new_tab(self):
+        return await self.context.new_page()
+
+    async def close_tab(self, handle):
+        await handle.close()
+
+    def process_ids(self):
+        # Playwright 的 node 驱动进程是当前进程的子进程，Chromium 又是它的子进程
+        try:
+            import psutil
+            return [child.pid for child in psutil.Process().children()]
+        except Exception:
+            return []
+
+    async def get_cookies(self):
+        cookies = []
+        for cookie in await self.context.cookies():
+            item = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')
+                    if key in cookie}
+            if cookie.get('expires', -1) > 0:
+                item['expiry'] = int(cookie['expires'])
+            cookies.append(item)
+        return cookies
+
+    async def add_cookies(self, cookies):
+        items = []
+        for cookie in cookies:
+            item = {
+                'name': cookie['name'],
+                'value': cookie['value'],
+                'path': cookie.get('path', '/'),
+                'secure': cookie.get('secure', False),
+                'httpOnly': cookie.get('httpOnly', False),
+            }
+            if cookie.get('domain'):
+                item['domain'] = cookie['domain']
+            else:
+                item['url'] = self.bot.renew_url
+                item.pop('path')
+            if cookie.get('expiry'):
+                item['expires'] = cookie['expiry']
+            if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+                item['sameSite'] = cookie['sameSite']
+            items.append(item)
+        try:
+            await self.context.add_cookies(items)
+            return True
+        except Exception as e:
+            logger.warning(f'⚠️ 注入会话cookie失败: {e}')
+            return False
+
+    async def capture(self, name):
+        if self.screenshots.policy == 'never':
+            return
+        try:
+            raw = await self.page.screenshot(type='jpeg', quality=self.screenshots.quality)
+        except Exception as e:
+            logger.warning(f'⚠️ 截图失败 {name}: {e}')
+            return
+        self.screenshots.capture_bytes(name, raw)
+
+    async def open_renew_page(self, url=None):
+        self.begin_page(url or self.bot.renew_url)
+        await self._timed('续期页面加载', self.page.goto(url or self.bot.renew_url, wait_until='load',
+                                                    timeout=self._budget_ms(60)))
+        return '/auth/login' not in self.page.url
+
+    async def login(self):
+        page = self.page
+        bot = self.bot
+
+        with self.report.span('login_page_load'):
+            # 会话失效时已被重定向到登录页，无需再次加载
+            if '/auth/login' not in page.url:
+                logger.info('🌐 访问登录页面...')
+                self.begin_page(bot.login_url)
+                await self._timed('登录页面加载', page.goto(bot.login_url, wait_until='load', timeout=self._budget_ms(60)))
+            await self._timed('登录表单可见', page.wait_for_selector('#email', state='visible', timeout=self._budget_ms(30)))
+            await self.capture('login_page')
+
+        with self.report.span('form_submit') as span:
+            logger.info('⌨️ 输入登录信息...')
+            await page.fill('#email', bot.email, timeout=self._budget_ms(10))
+            await page.fill('#password', bot.password, timeout=self._budget_ms(10))
+
+            logger.info('🖱️ 点击登录按钮...')
+            self.begin_page()
+            await page.click('#submit', timeout=self._budget_ms(10))
+
+            # 等待登录完成：离开登录页并加载完毕
+            await self._timed('离开登录页',
+                              page.wait_for_url(lambda url: '/auth/login' not in url, wait_until='load',
+                                                timeout=self._budget_ms(20)),
+                              required=False)
+
+            if '/auth/login' in page.url or 'dashboard' not in page.url:
+                span['outcome'] = 'failed'
+                logger.error(f'❌ 登录失败，当前URL: {page.url}')
+                return False
+
+        return True
+
+    async def click_renew(self):
+        logger.info('🖱️ 点击续期按钮...')
+        self.begin_page()
+        # click 自带等待元素可见、稳定、可点击
+        await self.page.click(RENEW_BUTTON_SELECTOR, timeout=self._budget_ms(30))
+
+    async def _token_ready(self, timeout):
+        try:
+            await self.page.wait_for_function(TOKEN_JS, timeout=timeout * 1000)
+            return True
+        except Exception:
+            return False
+
+    async def verify(self):
+        """等待token；出现Turnstile复选框时用鼠标点击它"""
+        page = self.page
+        max_wait_time = min(90, max(self.bot.deadline.remaining(), 0))
+        start = time.monotonic()
+
+        logger.info('🔐 开始处理Turnstile验证...')
+        while time.monotonic() - start < max_wait_time:
+            if await self._token_ready(min(2, max(self.bot.deadline.remaining(), 0.1))):
+                self.wait_history.append(('Turnstile验证', time.monotonic() - start, True))
+                logger.info('✅ Turnstile验证已完成！')
+                return True
+
+            for frame in page.frames:
+                if TURNSTILE_FRAME not in frame.url:
+                    continue
+                try:
+                    element = await frame.frame_element()
+                    box = await element.bounding_box()
+                    if not box:
+                        continue
+                    # 复选框位于组件左侧
+                    x = box['x'] + min(30, box['width'] / 2)
+                    y = box['y'] + box['height'] / 2
+                    logger.info(f'🖱️ 点击Turnstile复选框 ({x:.0f}, {y:.0f})', extra={'poll': 'turnstile_click'})
+                    await page.mouse.click(x, y, delay=50)
+                except Exception as e:
+                    logger.warning(f'处理Turnstile iframe失败: {e}', extra={'poll': 'turnstile_error'})
+
+            await asyncio.sleep(1)
+
+        self.wait_history.append(('Turnstile验证', time.monotonic() - start, False))
+        logger.warning('⚠️ Turnstile验证超时')
+        return False
+
+    async def settle(self):
+        await self._timed('网络空闲', self.page.wait_for_load_state('networkidle', timeout=self._budget_ms(10)), required=False)
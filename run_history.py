@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行历史 - 每次运行的结果、耗时、阶段用时和看到的到期时间追加到一个JSON文件
+（路径由 HISTORY_PATH 指定，工作流用 actions/cache 在运行之间保留）
+
+next-due 命令读取历史，判断现在是否需要运行、或者还要等多久:
+    python run_history.py next-due [--github-output]
+"""
+
+import os
+import sys
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+# 最多保留的运行记录条数
+DEFAULT_KEEP = 200
+
+# 与 http_probe.DEFAULT_RENEW_BEFORE_HOURS 一致；这里不导入 http_probe，保持命令轻量
+DEFAULT_RENEW_BEFORE_HOURS = 24
+
+# 读不到到期时间时，距上次成功运行满这么多小时才再次运行（与原来每天一次的计划一致）
+DEFAULT_UNKNOWN_INTERVAL_HOURS = 24
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+class NextDue:
+    """next-due 的判断结果: due 为真表示现在就运行，否则 wait 为还需等待的时长"""
+
+    def __init__(self, due, reason, due_at=None, now=None):
+        self.due = due
+        self.reason = reason
+        self.due_at = due_at
+        self.wait = timedelta(0) if due or due_at is None else max(due_at - now, timedelta(0))
+
+    def to_dict(self):
+        return {
+            'due': self.due,
+            'reason': self.reason,
+            'due_at': self.due_at.isoformat(timespec='seconds') if self.due_at else None,
+            'wait_seconds': int(self.wait.total_seconds()),
+        }
+
+
+class RunHistory:
+    """运行记录文件，最新的记录在最后"""
+
+    def __init__(self, path, keep=DEFAULT_KEEP):
+        self.path = path
+        self.keep = keep
+
+    @classmethod
+    def from_env(cls):
+        """HISTORY_PATH 未设置时返回 None（功能默认关闭）"""
+        path = os.getenv('HISTORY_PATH')
+        if not path:
+            return None
+        return cls(os.path.expanduser(path), int(os.getenv('HISTORY_KEEP') or DEFAULT_KEEP))
+
+    def load(self):
+        """读取全部记录，文件不存在或损坏时返回空列表"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logger.warning(f'⚠️ 运行历史读取失败，忽略: {e}')
+            return []
+        return data.get('runs') or []
+
+    def append(self, record):
+        """追加一条记录并原子写回，只保留最近 keep 条"""
+        runs = (self.load() + [record])[-self.keep:]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'runs': runs}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        logger.info(f'🗃️ 运行历史已保存: {self.path} (共 {len(runs)} 条)')
+
+    def latest_expiries(self, runs=None):
+        """最近一次运行涉及的每台服务器最后一次看到的到期时间 {URL: datetime 或 None}
+
+        成功续期（未跳过）的运行之后到期时间已经改变，之前记录的日期不再有效。
+        """
+        runs = self.load() if runs is None else runs
+        if not runs:
+            return {}
+        expiries = {url: None for url in runs[-1].get('servers') or {}}
+        for run in runs:
+            renewed = run.get('success') and not run.get('skipped')
+            for url, expiry in (run.get('servers') or {}).items():
+                if url not in expiries:
+                    continue
+                if expiry:
+                    expiries[url] = _parse_time(expiry)
+                elif renewed:
+                    expiries[url] = None
+        return expiries
+
+    @staticmethod
+    def last_success(runs):
+        """最近一次成功运行（含预检后跳过的运行）的结束时间"""
+        for run in reversed(runs):
+            finished_at = _parse_time(run.get('finished_at'))
+            if run.get('success') and finished_at:
+                return finished_at
+        return None
+
+    def next_due(self, now=None, renew_before_hours=DEFAULT_RENEW_BEFORE_HOURS,
+                 unknown_interval_hours=DEFAULT_UNKNOWN_INTERVAL_HOURS):
+        """根据最早到期的服务器计算下一次需要运行的时间
+
+        有服务器的到期时间未知时（页面解析不到日期），按上次成功运行之后 unknown_interval_hours 小时计算，
+        避免每次定时触发都启动浏览器。
+        """
+        now = now or datetime.now(timezone.utc)
+        runs = self.load()
+        if not runs:
+            return NextDue(True, '没有运行历史', now=now)
+
+        expiries = self.latest_expiries(runs)
+        # (需要运行的时间, 需要运行时的说明, 还不需要时的说明)
+        candidates = [
+            (expiry - timedelta(hours=renew_before_hours),
+             f'{url} 将于 {expiry:%Y-%m-%d %H:%M} 到期', f'最早到期 {expiry:%Y-%m-%d %H:%M} ({url})')
+            for url, expiry in expiries.items() if expiry is not None
+        ]
+        unknown = [url for url, expiry in expiries.items() if expiry is None]
+        if not expiries or unknown:
+            count = len(unknown) or '全部'
+            last = self.last_success(runs)
+            if last is None:
+                return NextDue(True, f'{count} 台服务器的到期时间未知，且没有成功的运行记录', now=now)
+            note = f'{count} 台服务器的到期时间未知，上次成功运行于 {last:%Y-%m-%d %H:%M}'
+            candidates.append((last + timedelta(hours=unknown_interval_hours), note, note))
+
+        due_at, due_reason, wait_reason = min(candidates, key=lambda item: item[0])
+        if now >= due_at:
+            return NextDue(True, due_reason, due_at, now)
+        return NextDue(False, wait_reason, due_at, now)
+
+
+def build_record(report_data, servers, skipped=False):
+    """把运行报告整理成历史记录；servers 为 {URL: 到期时间 datetime 或 None}"""
+    phases = {}
+    for span in report_data.get('spans') or []:
+        if span.get('duration_ms') is not None:
+            phases[span['name']] = round(phases.get(span['name'], 0) + span['duration_ms'], 1)
+    return {
+        'started_at': report_data.get('started_at'),
+        'finished_at': report_data.get('finished_at'),
+        'success': report_data.get('success'),
+        'skipped': skipped,
+        'duration_ms': report_data.get('duration_ms'),
+        'backend': report_data.get('backend'),
+        'phases': phases,
+        'servers': {url: expiry.isoformat() if expiry else None for url, expiry in servers.items()},
+    }
+
+
+def main():
+    """python run_history.py next-due [--path ...] [--renew-before-hours 24] [--github-output]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='运行历史')
+    commands = parser.add_subparsers(dest='command', required=True)
+    next_due = commands.add_parser('next-due', help='判断现在是否需要运行')
+    next_due.add_argument('--path', default=os.getenv('HISTORY_PATH'), help='历史文件，默认读取 HISTORY_PATH')
+    next_due.add_argument('--renew-before-hours', type=float,
+                          default=float(os.getenv('RENEW_BEFORE_HOURS') or DEFAULT_RENEW_BEFORE_HOURS))
+    next_due.add_argument('--unknown-interval-hours', type=float, default=DEFAULT_UNKNOWN_INTERVAL_HOURS,
+                          help='到期时间未知时两次运行的间隔')
+    next_due.add_argument('--now', help='当前时间(UTC, ISO格式)，默认为系统时间')
+    next_due.add_argument('--github-output', action='store_true',
+                          help='把 due/wait_seconds 写入 $GITHUB_OUTPUT，退出码始终为0')
+    args = parser.parse_args()
+
+    if not args.path:
+        parser.error('需要 --path 或 HISTORY_PATH')
+    now = _parse_time(args.now) if args.now else None
+    result = RunHistory(os.path.expanduser(args.path)).next_due(
+        now=now, renew_before_hours=args.renew_before_hours, unknown_interval_hours=args.unknown_interval_hours)
+    print(json.dumps(result.to_dict(), ensure_ascii=False))
+
+    if args.github_output:
+        output = os.getenv('GITHUB_OUTPUT')
+        if output:
+            with open(output, 'a', encoding='utf-8') as f:
+                f.write(f'due={str(result.due).lower()}\n')
+                f.write(f'wait_seconds={int(result.wait.total_seconds())}\n')
+        sys.exit(0)
+    # 退出码与 http_probe 一致: 0 不需要运行, 1 需要运行
+    sys.exit(1 if result.due else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行报告 - 记录每个阶段的开始时间、耗时和结果
+结束时写出JSON报告（路径由 RUN_REPORT_PATH 指定），供工作流作为构件上传
+"""
+
+import os
+import json
+import time
+import logging
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+from deadline import DeadlineExceeded
+from log_setup import current_phase
+
+logger = logging.getLogger(__name__)
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+
+
+class RunReport:
+    """一次运行的阶段耗时记录"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.started_at = _now_iso()
+        self._start = time.monotonic()
+        self.spans = []
+        self.extra = {}
+        # 阶段结束时调用，参数为 span 字典（例如补充内存采样）
+        self.listeners = []
+        # 设置后每个阶段同时进入 deadline 的阶段预算
+        self.deadline = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.getenv('RUN_REPORT_PATH'))
+
+    @contextmanager
+    def span(self, name, **fields):
+        """记录一个阶段；异常时 outcome 为 error（超时为 deadline）并继续抛出，可在块内把 outcome 改为 failed/skipped
+
+        fields 附加到阶段记录中（例如多台服务器并发时的 server）
+        """
+        span = {
+            'name': name,
+            **fields,
+            'started_at': _now_iso(),
+            'offset_ms': round((time.monotonic() - self._start) * 1000, 1),
+            'duration_ms': None,
+            'outcome': 'ok',
+        }
+        self.spans.append(span)
+        token = current_phase.set(name)
+        start = time.monotonic()
+        budget = self.deadline.phase(name) if self.deadline else nullcontext()
+        try:
+            with budget:
+                yield span
+        except BaseException as e:
+            span['outcome'] = 'deadline' if isinstance(e, DeadlineExceeded) else 'error'
+            span['error'] = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            span['duration_ms'] = round((time.monotonic() - start) * 1000, 1)
+            for listener in self.listeners:
+                try:
+                    listener(span)
+                except Exception as e:
+                    logger.warning(f'⚠️ 阶段监听器出错: {e}')
+            label = f'{name} [{fields["server"]}]' if 'server' in fields else name
+            logger.info(f'⏱️ 阶段 {label}: {span["outcome"]}，用时 {span["duration_ms"]:.0f}ms')
+            current_phase.reset(token)
+
+    def to_dict(self, success=None):
+        return {
+            'started_at': self.started_at,
+            'finished_at': _now_iso(),
+            'duration_ms': round((time.monotonic() - self._start) * 1000, 1),
+            'success': success,
+            'spans': self.spans,
+            **self.extra,
+        }
+
+    def write(self, success=None):
+        """写出JSON报告，未设置路径时只记录日志"""
+        data = self.to_dict(success)
+        logger.info(f'📊 总用时 {data["duration_ms"] / 1000:.2f}秒，共 {len(self.spans)} 个阶段')
+        if not self.path:
+            return data
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            logger.info(f'📊 运行报告已保存: {self.path}')
+        except OSError as e:
+            logger.warning(f'⚠️ 运行报告保存失败: {e}')
+        return data
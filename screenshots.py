@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截图管理 - 截图解码/缩放/压缩/写盘都在后台线程进行
+内存中保留最近几帧，按策略决定何时写入磁盘:
+    never       不截图
+    on-failure  只在运行失败时把内存中的最近几帧写入磁盘（默认）
+    always      每帧都写入磁盘
+"""
+
+import io
+import os
+import base64
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('never', 'on-failure', 'always')
+
+
+class ScreenshotManager:
+    """环形缓冲的后台截图"""
+
+    def __init__(self, policy='on-failure', directory='/tmp/screenshots', ring_size=5, max_width=960, quality=60):
+        if policy not in POLICIES:
+            logger.warning(f'⚠️ 未知的截图策略 {policy}，使用 on-failure')
+            policy = 'on-failure'
+        self.policy = policy
+        self.directory = directory
+        self.max_width = max_width
+        self.quality = quality
+        self.ring = deque(maxlen=ring_size)
+        self.saved = []
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._executor = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            policy=os.getenv('SCREENSHOT_POLICY') or 'on-failure',
+            directory=os.getenv('SCREENSHOT_DIR') or '/tmp/screenshots',
+            ring_size=int(os.getenv('SCREENSHOT_RING_SIZE') or 5),
+            max_width=int(os.getenv('SCREENSHOT_MAX_WIDTH') or 960),
+        )
+
+    def _submit(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='screenshot')
+        return self._executor.submit(fn, *args)
+
+    def capture(self, driver, name):
+        """抓取一帧；只有抓取本身在调用线程，其余处理交给后台线程"""
+        if self.policy == 'never':
+            return
+        try:
+            # 让浏览器直接编码为JPEG，比PNG更快、传输更小
+            data = driver.execute_cdp_cmd('Page.captureScreenshot', {'format': 'jpeg', 'quality': self.quality})['data']
+            raw = base64.b64decode(data)
+        except Exception:
+            try:
+                raw = driver.get_screenshot_as_png()
+            except Exception as e:
+                logger.warning(f'⚠️ 截图失败 {name}: {e}')
+                return
+        self.capture_bytes(name, raw)
+
+    def capture_bytes(self, name, raw):
+        """交给后台线程处理已抓取的图像数据（PNG/JPEG）"""
+        if self.policy == 'never':
+            return
+        self._counter += 1
+        self._submit(self._process, self._counter, name, raw)
+
+    def _process(self, index, name, raw):
+        try:
+            frame = self._compress(raw)
+        except Exception as e:
+            logger.warning(f'⚠️ 截图压缩失败 {name}: {e}')
+            frame = raw
+        with self._lock:
+            self.ring.append((index, name, frame))
+        if self.policy == 'always':
+            self._write(index, name, frame)
+
+    def _compress(self, raw):
+        """用Pillow缩小并压缩为JPEG，Pillow不可用时原样保留"""
+        try:
+            from PIL import Image
+        except ImportError:
+            return raw
+        image = Image.open(io.BytesIO(raw)).convert('RGB')
+        if image.width > self.max_width:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height))
+        out = io.BytesIO()
+        image.save(out, format='JPEG', quality=self.quality, optimize=True)
+        return out.getvalue()
+
+    def _write(self, index, name, frame):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{index:02d}_{name}.jpg')
+        with open(path, 'wb') as f:
+            f.write(frame)
+        self.saved.append(path)
+        logger.info(f'📸 截图已保存: {path}')
+
+    def flush(self):
+        """运行失败时把内存中的最近几帧写入磁盘（always 策略已写过）"""
+        if self.policy != 'on-failure':
+            return
+        if self._executor is not None:
+            self._executor.submit(lambda: None).result()
+        with self._lock:
+            frames = list(self.ring)
+            self.ring.clear()
+        for index, name, frame in frames:
+            try:
+                self._write(index, name, frame)
+            except OSError as e:
+                logger.warning(f'⚠️ 截图保存失败 {name}: {e}')
+
+    def close(self, failed=False):
+        """等待后台任务结束；failed 为真时先写出最近几帧"""
+        if failed:
+            self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        return self.saved
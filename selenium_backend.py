@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Selenium后端 - undetected_chromedriver 驱动Chrome，pyautogui 真实鼠标点击绕过自动化检测
+"""
+
+import os
+import time
+import logging
+
+import dom
+import waits
+import lean_mode
+from browser_backend import BrowserBackend, USER_AGENT, RENEW_BUTTON_SELECTOR
+from driver_cache import DriverCache
+from waterfall import Waterfall
+
+logger = logging.getLogger(__name__)
+
+
+class SeleniumBackend(BrowserBackend):
+    name = 'selenium'
+    install_hint = 'pip install undetected-chromedriver pyautogui pillow'
+    # WebDriver 同一时刻只能操作一个窗口，真实鼠标也只能点击最前面的标签页
+    max_tabs = 1
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        self.driver = None
+        self.pyautogui = None
+        self.waiter = None
+        self._main_handle = None
+    
+    async def start(self):
+        """导入依赖、设置pyautogui并启动有头（或无头）Chrome"""
+        report = self.report
+        headless = self.bot.headless
+        
+        with report.span('imports'):
+            import undetected_chromedriver as uc
+        
+        if headless:
+            logger.info('ℹ️ 无头模式，跳过pyautogui')
+        else:
+            # 设置pyautogui
+            with report.span('setup_pyautogui') as span:
+                self.pyautogui = self.setup_pyautogui()
+                if not self.pyautogui:
+                    span['outcome'] = 'failed'
+                    logger.error('❌ pyautogui设置失败')
+                    return False
+        
+        logger.info('🔧 初始化' + ('无头' if headless else '有头') + '模式Chrome...')
+        
+        with report.span('browser_launch'):
+            options = uc.ChromeOptions()
+            
+            # 关键：正式运行不使用headless模式！
+            if headless:
+                options.add_argument('--headless=new')
+            
+            # 基本设置
+            options.add_argument('--no-sandbox')
+            options.add_argument('--disable-dev-shm-usage')
+            options.add_argument('--disable-gpu')
+            options.add_argument('--window-size=1366,768')
+            options.add_argument('--window-position=0,0')
+            
+            # 反检测设置
+            options.add_argument('--disable-blink-features=AutomationControlled')
+            options.add_argument('--disable-extensions')
+            options.add_argument('--no-first-run')
+            options.add_argument('--disable-default-apps')
+            
+            # 用户代理
+            options.add_argument(f'--user-agent={USER_AGENT}')
+            
+            # GitHub Actions环境特殊设置
+            if os.getenv('GITHUB_ACTIONS'):
+                options.add_argument('--display=:99')
+                options.add_argument('--no-xshm')  # 禁用共享内存
+            
+            lean = lean_mode.lean_enabled()
+            if lean:
+                lean_mode.apply_lean_options(options)
+            
+            # 网络瀑布图：开启 performance 日志，chromedriver 会记录 Network/Page 事件
+            waterfall = Waterfall.from_env()
+            if waterfall:
+                options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+            
+            self.driver = driver = self.launch_chrome(uc, options)
+            self._main_handle = driver.current_window_handle
+            self.waterfall = waterfall
+            self.waiter = waits.Waiter(driver, timeout=30, poll=0.25, deadline=self.bot.deadline)
+            self.wait_history = self.waiter.history
+            
+            if lean:
+                try:
+                    self.blocked_url_patterns = lean_mode.enable_blocking(driver)
+                except Exception as e:
+                    logger.warning(f'⚠️ 精简模式拦截设置失败: {e}')
+            
+            # 最大化窗口确保元素可见
+            try:
+                driver.maximize_window()
+                logger.info('✅ 浏览器窗口已最大化')
+            except:
+                logger.info('ℹ️ 窗口最大化失败，继续执行')
+        
+        return True
+    
+    async def close(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+    
+    async def alive(self):
+        if self.driver is None:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+    
+    async def new_tab(self):
+        self.driver.switch_to.new_window('tab')
+        return self.driver.current_window_handle
+    
+    async def close_tab(self, handle):
+        self.driver.switch_to.window(handle)
+        self.driver.close()
+        self.driver.switch_to.window(self._main_handle)
+    
+    def drain_network_events(self):
+        if self.waterfall is not None and self.driver is not None:
+            self.waterfall.add_performance_log(self.driver.get_log('performance'))
+    
+    def process_ids(self):
+        # undetected_chromedriver 单独启动浏览器进程，chromedriver 和 Chrome 分属两棵进程树
+        driver = self.driver
+        service_process = getattr(getattr(driver, 'service', None), 'process', None)
+        return [pid for pid in (getattr(service_process, 'pid', None), getattr(driver, 'browser_pid', None)) if pid]
+    
+    async def get_cookies(self):
+        return self.driver.get_cookies()
+    
+    async def capture(self, name):
+        self.screenshots.capture(self.driver, name)
+    
+    def load(self, url, timeout=60):
+        """带时限的 driver.get：页面加载超时截断到剩余时间内，卡住的加载不会耗尽整个任务"""
+        self.driver.set_page_load_timeout(max(1, self.bot.deadline.clamp(timeout)))
+        self.begin_page(url)
+        self.driver.get(url)
+    
+    async def open_renew_page(self, url=None):
+        """打开续期页面，被重定向到登录页时返回 False"""
+        self.load(url or self.bot.renew_url)
+        self.waiter.until(waits.document_ready(), timeout=15)
+        return '/auth/login' not in self.driver.current_url
+    
+    async def login(self):
+        """登录流程"""
+        driver = self.driver
+        waiter = self.waiter
+        bot = self.bot
+        
+        with self.report.span('login_page_load'):
+            # 会话失效时已被重定向到登录页，无需再次加载
+            if '/auth/login' not in driver.current_url:
+                logger.info('🌐 访问登录页面...')
+                self.load(bot.login_url)
+            waiter.until(waits.document_ready(), timeout=15)
+            
+            # 输入登录信息：一次往返取回三个元素
+            found = waiter.until(dom.elements_ready({
+                'email': '#email',
+                'password': '#password',
+                'submit': '#submit',
+            }), timeout=30)
+            email_field = found['email']['element']
+            password_field = found['password']['element']
+            login_btn = found['submit']['element']
+            self.screenshots.capture(driver, 'login_page')
+        
+        with self.report.span('form_submit') as span:
+            # 使用真实的键盘输入（可选）
+            logger.info('⌨️ 输入登录信息...')
+            email_field.clear()
+            email_field.send_keys(bot.email)
+            waiter.until(waits.field_value_equals(email_field, bot.email), timeout=5, poll=0.1, required=False)
+            
+            password_field.clear()
+            password_field.send_keys(bot.password)
+            waiter.until(waits.field_value_equals(password_field, bot.password), timeout=5, poll=0.1, required=False)
+            
+            # 使用真实鼠标点击登录按钮
+            logger.info('🖱️ 使用真实鼠标点击登录按钮...')
+            self.begin_page()
+            self.real_mouse_click(driver, login_btn, self.pyautogui)
+            
+            # 等待登录完成：离开登录页并加载完毕
+            waiter.until(waits.url_not_contains('/auth/login'), timeout=20, required=False)
+            waiter.until(waits.document_ready(), timeout=15, required=False)
+            
+            if '/auth/login' in driver.current_url or 'dashboard' not in driver.current_url:
+                span['outcome'] = 'failed'
+                logger.error(f'❌ 登录失败，当前URL: {driver.current_url}')
+                return False
+        
+        return True
+    
+    async def add_cookies(self, cookies):
+        """通过CDP在导航前注入缓存的cookie"""
+        driver = self.driver
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            for cookie in cookies:
+                params = {
+                    'name': cookie['name'],
+                    'value': cookie['value'],
+                    'path': cookie.get('path', '/'),
+                    'secure': cookie.get('secure', False),
+                    'httpOnly': cookie.get('httpOnly', False),
+                }
+                if cookie.get('domain'):
+                    params['domain'] = cookie['domain']
+                else:
+                    params['url'] = self.bot.renew_url
+                if cookie.get('expiry'):
+                    params['expires'] = cookie['expiry']
+                if cookie.get('sameSite'):
+                    params['sameSite'] = cookie['sameSite']
+                driver.execute_cdp_cmd('Network.setCookie', params)
+            return True
+        except Exception as e:
+            logger.warning(f'⚠️ 注入会话cookie失败: {e}')
+            return False
+    
+    async def click_renew(self):
+        # 查找续期按钮
+        found = self.waiter.until(dom.elements_ready({'renew': RENEW_BUTTON_SELECTOR}), timeout=30)
+        renew_btn = found['renew']['element']
+        
+        # 使用真实鼠标点击续期按钮
+        logger.info('🖱️ 使用真实鼠标点击续期按钮...')
+        self.begin_page()
+        self.real_mouse_click(self.driver, renew_btn, self.pyautogui)
+    
+    async def verify(self):
+        # 等待Turnstile加载（iframe/容器出现或已经拿到token）
+        self.waiter.until(waits.any_of(
+            self.check_turnstile_completion,
+            lambda d: any(dom.find_batch(d, {
+                'iframe': 'iframe[src*="challenges.cloudflare.com"]',
+                'widget': '.cf-turnstile, [data-sitekey]',
+            }).values()),
+        ), desc='Turnstile加载', timeout=10, required=False)
+        
+        # 处理Turnstile验证
+        logger.info('🔐 开始使用真实鼠标处理Turnstile验证...')
+        return await self.handle_turnstile_with_real_mouse(self.driver, self.pyautogui)
+    
+    async def settle(self):
+        # 等待最终完成：续期请求发送完毕
+        self.waiter.until(waits.network_idle(500), timeout=10, required=False)
+    
+    def setup_pyautogui(self):
+        """设置pyautogui"""
+        try:
+            import pyautogui
+            
+            # 设置pyautogui参数
+            pyautogui.FAILSAFE = True  # 启用故障安全
+            pyautogui.PAUSE = 0.1  # 每次操作间隔
+            
+            # 检查屏幕尺寸
+            screen_width, screen_height = pyautogui.size()
+            logger.info(f'🖥️ 屏幕尺寸: {screen_width}x{screen_height}')
+            
+            return pyautogui
+            
+        except ImportError:
+            logger.error('❌ pyautogui 未安装，请运行: pip install pyautogui')
+            return None
+        except Exception as e:
+            logger.error(f'❌ 设置pyautogui失败: {e}')
+            return None
+    
+    def launch_chrome(self, uc, options):
+        """启动Chrome，设置 DRIVER_CACHE_DIR 时复用已打补丁的chromedriver"""
+        start = time.monotonic()
+        cache = DriverCache.from_env()
+        cached_path = cache.lookup() if cache else None
+        
+        kwargs = {'options': options, 'version_main': None, 'use_subprocess': True}
+        if cache:
+            kwargs['version_main'] = cache.chrome_major
+        if cached_path:
+            kwargs['driver_executable_path'] = cached_path
+        
+        driver = uc.Chrome(**kwargs)
+        
+        if cache and not cached_path:
+            try:
+                cache.store(driver.patcher.executable_path)
+            except Exception as e:
+                logger.warning(f'⚠️ 写入chromedriver缓存失败: {e}')
+        
+        elapsed = time.monotonic() - start
+        if cache:
+            status = '命中' if cached_path else '未命中'
+            logger.info(f'🚗 chromedriver缓存{status} (Chrome {cache.chrome_major})，驱动启动用时 {elapsed:.2f}秒')
+        else:
+            logger.info(f'🚗 驱动启动用时 {elapsed:.2f}秒')
+        return driver
+    
+    def real_mouse_click(self, driver, element, pyautogui):
+        """使用真实鼠标点击元素"""
+        if pyautogui is None:
+            driver.execute_script("arguments[0].click();", element)
+            logger.info('✅ JavaScript点击完成')
+            return True
+        
+        try:
+            # 滚动到元素位置并获取最终坐标（一次往返）
+            rect = dom.scroll_and_measure(driver, element)
+            
+            # 计算点击位置（元素中心）
+            click_x, click_y = dom.center(rect)
+            
+            logger.info(f'🎯 元素位置: ({rect["x"]:.0f}, {rect["y"]:.0f}), 尺寸: ({rect["width"]:.0f}, {rect["height"]:.0f})')
+            logger.info(f'🖱️ 真实鼠标点击位置: ({click_x}, {click_y})')
+            
+            # 使用pyautogui进行真实鼠标点击
+            pyautogui.click(click_x, click_y, duration=0.2)
+            logger.info('✅ 真实鼠标点击完成')
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f'❌ 真实鼠标点击失败: {e}')
+            
+            # 备用方案：JavaScript点击
+            try:
+                driver.execute_script("arguments[0].click();", element)
+                logger.info('✅ 备用JavaScript点击完成')
+                return True
+            except Exception as e2:
+                logger.error(f'❌ JavaScript点击也失败: {e2}')
+                return False
+    
+    async def handle_turnstile_with_real_mouse(self, driver, pyautogui):
+        """使用真实鼠标处理Turnstile验证"""
+        from selenium.webdriver.common.by import By
+        
+        max_wait_time = min(90, max(self.bot.deadline.remaining(), 0))
+        start_time = time.time()
+        waiter = waits.Waiter(driver, poll=0.25, deadline=self.bot.deadline)
+        
+        logger.info('🔍 寻找Turnstile验证框...')
+        
+        while time.time() - start_time < max_wait_time:
+            try:
+                # 检查是否已经完成验证
+                if self.check_turnstile_completion(driver):
+                    logger.info('✅ Turnstile验证已完成！')
+                    return True
+                
+                # 查找所有iframe
+                iframes = driver.find_elements(By.TAG_NAME, 'iframe')
+                logger.info(f'🔍 找到 {len(iframes)} 个iframe', extra={'poll': 'iframe_count'})
+                
+                for i, iframe in enumerate(iframes):
+                    try:
+                        src = iframe.get_attribute('src') or ''
+                        logger.info(f'iframe {i+1}: {src}', extra={'poll': f'iframe_src_{i}'})
+                        
+                        # 检查是否是Turnstile iframe
+                        if any(keyword in src.lower() for keyword in ['challenges.cloudflare.com', 'turnstile']):
+                            logger.info(f'🎯 发现Turnstile iframe {i+1}', extra={'poll': f'turnstile_iframe_{i}'})
+                            
+                            # 切换到iframe
+                            driver.switch_to.frame(iframe)
+                            
+                            # 查找checkbox
+                            checkbox_selectors = [
+                                'input[type="checkbox"]',
+                                '[role="checkbox"]',
+                                '.cb-i',
+                                'span[role="checkbox"]',
+                                'div[role="checkbox"]'
+                            ]
+                            
+                            for selector in checkbox_selectors:
+                                try:
+                                    checkboxes = driver.find_elements(By.CSS_SELECTOR, selector)
+                                    logger.info(f'选择器 {selector} 找到 {len(checkboxes)} 个元素', extra={'poll': f'checkbox_{selector}'})
+                                    
+                                    for j, checkbox in enumerate(checkboxes):
+                                        try:
+                                            if checkbox.is_displayed():
+                                                logger.info(f'🖱️ 尝试真实鼠标点击复选框 {j+1}')
+                                                
+                                                # 获取iframe在页面中的位置
+                                                iframe_rect = driver.execute_script("""
+                                                    return arguments[0].getBoundingClientRect();
+                                                """, iframe)
+                                                
+                                                # 获取checkbox在iframe中的位置
+                                                checkbox_rect = driver.execute_script("""
+                                                    return arguments[0].getBoundingClientRect();
+                                                """, checkbox)
+                                                
+                                                # 计算checkbox在整个页面中的绝对位置
+                                                absolute_x = iframe_rect['x'] + checkbox_rect['x'] + checkbox_rect['width'] // 2
+                                                absolute_y = iframe_rect['y'] + checkbox_rect['y'] + checkbox_rect['height'] // 2
+                                                
+                                                logger.info(f'🎯 Turnstile复选框绝对位置: ({absolute_x}, {absolute_y})')
+                                                
+                                                # 使用真实鼠标点击
+                                                pyautogui.click(absolute_x, absolute_y, duration=0.3)
+                                                logger.info('✅ 已使用真实鼠标点击Turnstile复选框')
+                                                
+                                                driver.switch_to.default_content()
+                                                
+                                                # 等待验证处理并检查是否完成
+                                                if waiter.until(self.check_turnstile_completion, desc='Turnstile验证', timeout=3, required=False):
+                                                    logger.info('🎉 Turnstile验证成功完成！')
+                                                    return True
+                                                
+                                                # 重新进入iframe继续尝试
+                                                driver.switch_to.frame(iframe)
+                                                
+                                        except Exception as e:
+                                            logger.warning(f'处理复选框 {j+1} 失败: {e}')
+                                            
+                                except Exception as e:
+                                    logger.warning(f'查找选择器 {selector} 失败: {e}')
+                            
+                            driver.switch_to.default_content()
+                            
+                    except Exception as e:
+                        logger.warning(f'处理iframe {i+1} 失败: {e}')
+                        driver.switch_to.default_content()
+                
+                # 如果iframe方法失败，尝试主页面元素
+                logger.info('🔍 尝试在主页面查找Turnstile元素...', extra={'poll': 'main_page_search'})
+                main_selectors = [
+                    '[data-sitekey]',
+                    '.cf-turnstile',
+                    '[id*="turnstile"]',
+                    '[class*="turnstile"]'
+                ]
+                
+                for selector in main_selectors:
+                    try:
+                        elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                        if elements:
+                            logger.info(f'主页面找到 {len(elements)} 个 {selector} 元素', extra={'poll': f'main_page_{selector}'})
+                            
+                            for element in elements:
+                                if element.is_displayed():
+                                    logger.info('🖱️ 尝试真实鼠标点击主页面Turnstile元素')
+                                    
+                                    if self.real_mouse_click(driver, element, pyautogui):
+                                        if waiter.until(self.check_turnstile_completion, desc='Turnstile验证', timeout=3, required=False):
+                                            logger.info('🎉 主页面Turnstile验证成功！')
+                                            return True
+                                    
+                    except Exception as e:
+                        logger.warning(f'处理主页面选择器 {selector} 失败: {e}')
+                
+                # 等待一段时间再重试
+                elapsed = int(time.time() - start_time)
+                if elapsed % 10 == 0:
+                    logger.info(f'⏳ 真实鼠标Turnstile验证等待中... ({elapsed}/{max_wait_time}秒)', extra={'poll': 'turnstile_progress'})
+                
+                time.sleep(2)
+                
+            except Exception as e:
+                logger.warning(f'⚠️ 真实鼠标Turnstile处理异常: {e}')
+                time.sleep(2)
+        
+        logger.warning('⚠️ 真实鼠标Turnstile验证超时')
+        return False
+    
+    def check_turnstile_completion(self, driver):
+        """检查Turnstile是否已完成"""
+        try:
+            token_value = driver.execute_script(
+                "const el = document.querySelector('[name=\"cf-turnstile-response\"]'); return el ? el.value : null;"
+            )
+            
+            if token_value and len(token_value) > 10:
+                logger.info(f'✅ 检测到Turnstile token: {token_value[:20]}...')
+                return True
+                
+        except:
+            pass
+        
+        return False
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话缓存 - 按账号持久化登录后的cookie
+缓存有效时直接访问续期页面，跳过登录流程
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 缓存默认有效期（小时），cookie 自身的过期时间更早时以 cookie 为准
+DEFAULT_TTL_HOURS = 72
+
+
+class SessionStore:
+    """单个账号的cookie缓存文件"""
+
+    def __init__(self, directory, account, ttl_hours=DEFAULT_TTL_HOURS):
+        self.directory = directory
+        self.account = account
+        self.ttl = ttl_hours * 3600
+        key = hashlib.sha256(account.strip().lower().encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(directory, f'session_{key}.json')
+
+    @classmethod
+    def from_env(cls, account):
+        """SESSION_DIR 未设置时返回 None（功能默认关闭）"""
+        directory = os.getenv('SESSION_DIR')
+        if not directory:
+            return None
+        directory = os.path.expanduser(directory)
+        ttl_hours = float(os.getenv('SESSION_TTL_HOURS') or DEFAULT_TTL_HOURS)
+        store = cls(directory, account, ttl_hours)
+        if os.getenv('SESSION_RESET', '').lower() in ('1', 'true', 'yes'):
+            store.invalidate()
+        return store
+
+    def load(self):
+        """读取未过期的cookie列表，无效或不存在时返回 None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f'⚠️ 会话缓存读取失败，忽略: {e}')
+            self.invalidate()
+            return None
+
+        expires_at = data.get('expires_at', 0)
+        if time.time() >= expires_at:
+            logger.info('ℹ️ 会话缓存已过期')
+            self.invalidate()
+            return None
+
+        cookies = data.get('cookies') or []
+        if not cookies:
+            return None
+        remaining = (expires_at - time.time()) / 3600
+        logger.info(f'🍪 读取会话缓存: {len(cookies)} 个cookie，剩余有效期 {remaining:.1f} 小时')
+        return cookies
+
+    def save(self, cookies):
+        """保存cookie，过期时间取 TTL 与持久cookie最早过期时间中较早者"""
+        now = time.time()
+        expires_at = now + self.ttl
+        expiries = [c['expiry'] for c in cookies if c.get('expiry')]
+        if expiries:
+            expires_at = min(expires_at, min(expiries))
+
+        data = {
+            'saved_at': now,
+            'expires_at': expires_at,
+            'cookies': cookies,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        # cookie 等同于登录凭据，仅当前用户可读写
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        logger.info(f'🍪 会话缓存已保存: {len(cookies)} 个cookie')
+
+    def invalidate(self):
+        """删除缓存文件"""
+        try:
+            os.remove(self.path)
+            logger.info('🗑️ 会话缓存已清除')
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时分析 - 类似 python -X importtime，但内置在工具里:
+    python main.py --profile-startup
+记录每个模块的导入耗时（累计/自身）和各初始化步骤的耗时，
+运行结束时输出最慢的导入、各步骤以及到第一次页面操作的时间，并写入运行报告的 startup 字段
+
+未调用 install() 时 step()/mark() 都是空操作，其他模块可以无条件调用。
+"""
+
+import sys
+import time
+import logging
+import builtins
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_start = None
+_original_import = None
+_local = threading.local()
+_imports = []  # (模块名, 累计秒, 自身秒, 嵌套深度)
+_steps = []  # (步骤名, 开始偏移秒, 耗时秒)
+_marks = {}  # 时间点名 -> 偏移秒
+
+
+def enabled():
+    return _start is not None
+
+
+def install():
+    """开始计时并接管 __import__；应在导入其他模块之前调用"""
+    global _start, _original_import
+    if _start is not None:
+        return
+    _start = time.perf_counter()
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+
+
+def _resolve(name, globals, level):
+    if not level:
+        return name
+    # 与 importlib.util.resolve_name 相同的规则（这里不能再触发导入）
+    package = (globals or {}).get('__package__') or ''
+    bits = package.rsplit('.', level - 1)
+    if len(bits) < level:
+        return name
+    base = bits[0]
+    return f'{base}.{name}' if name else base
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    target = _resolve(name, globals, level)
+    if target in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    # 每个线程各自的嵌套栈，栈中记录子模块累计耗时
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        _imports.append((target, elapsed, elapsed - children, len(stack)))
+
+
+@contextmanager
+def step(name):
+    """记录一个初始化步骤的耗时"""
+    if _start is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps.append((name, start - _start, time.perf_counter() - start))
+
+
+def mark(name):
+    """记录一个时间点（只记录第一次），例如 first_action"""
+    if _start is not None and name not in _marks:
+        _marks[name] = time.perf_counter() - _start
+
+
+def summary(top=15):
+    """汇总为可写入JSON的字典"""
+    ms = lambda seconds: round(seconds * 1000, 1)
+    slowest = sorted(_imports, key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'elapsed_ms': ms(time.perf_counter() - _start),
+        'import_ms': ms(sum(elapsed for _, elapsed, _, depth in _imports if depth == 0)),
+        'modules': len(_imports),
+        'slowest_imports': [
+            {'module': name, 'cumulative_ms': ms(elapsed), 'self_ms': ms(own), 'depth': depth}
+            for name, elapsed, own, depth in slowest
+        ],
+        'steps': [{'name': name, 'offset_ms': ms(offset), 'duration_ms': ms(elapsed)} for name, offset, elapsed in _steps],
+        'marks_ms': {name: ms(offset) for name, offset in _marks.items()},
+    }
+
+
+def log_summary(top=15):
+    data = summary(top)
+    logger.info(f'🚀 启动耗时分析: 导入 {data["import_ms"]:.0f}ms（{data["modules"]} 个模块）')
+    logger.info(f'{"累计ms":>10}{"自身ms":>10}  模块')
+    for item in data['slowest_imports']:
+        logger.info(f'{item["cumulative_ms"]:>10.1f}{item["self_ms"]:>10.1f}  {"  " * item["depth"]}{item["module"]}')
+    for item in data['steps']:
+        logger.info(f'⏱️ 步骤 {item["name"]}: 第 {item["offset_ms"]:.0f}ms 开始，用时 {item["duration_ms"]:.0f}ms')
+    if 'first_action' in data['marks_ms']:
+        logger.info(f'🏁 到第一次页面操作: {data["marks_ms"]["first_action"]:.0f}ms')
+    return data
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+守护进程状态接口的测试 - 续期阻塞事件循环（Selenium后端）时 /status 仍然可以访问
+    python -m pytest tests
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeDeadline:
+    def restart(self):
+        pass
+
+
+class FakeBackend:
+    name = 'fake'
+
+    async def alive(self):
+        return True
+
+    def process_ids(self):
+        return []
+
+    async def close(self):
+        pass
+
+
+class BlockingBot:
+    """run() 像Selenium后端一样同步阻塞线程"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.keep_browser = False
+        self.history = None
+        self.expiries = {}
+        self.deadline = FakeDeadline()
+        self.started = threading.Event()
+        self.finished = False
+
+    def new_run(self):
+        pass
+
+    async def run(self):
+        self.started.set()
+        time.sleep(self.seconds)
+        self.finished = True
+        return True
+
+
+def test_status_answers_during_blocking_renewal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import daemon
+
+    monkeypatch.setattr(daemon, 'create_backend', lambda bot: FakeBackend())
+    bot = BlockingBot(seconds=1.5)
+    renew_daemon = daemon.RenewDaemon(bot, port=0)
+    responses = []
+
+    async def scenario():
+        server = renew_daemon.start_status_server(asyncio.get_running_loop())
+        url = f'http://127.0.0.1:{server.server_address[1]}/status'
+
+        def client():
+            bot.started.wait(5)
+            with urllib.request.urlopen(url, timeout=1) as response:
+                responses.append((json.load(response), bot.finished))
+
+        thread = threading.Thread(target=client)
+        thread.start()
+        try:
+            await renew_daemon.renew_once()
+        finally:
+            thread.join()
+            server.shutdown()
+            server.server_close()
+
+    asyncio.run(scenario())
+    assert len(responses) == 1
+    status, renewal_finished = responses[0]
+    assert renewal_finished is False
+    assert status['state'] == 'renewing'
+    assert renew_daemon.status()['runs'] == 1
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP预检的离线测试 - 用保存的续期页面解析到期时间并判断是否需要续期
+    python -m pytest tests
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_probe  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RENEW_URL = 'https://dashboard.katabump.com/servers/edit?id=123456'
+LOGIN_URL = 'https://dashboard.katabump.com/auth/login'
+# 夹具页面中的到期时间
+EXPIRY = datetime(2026, 3, 10, 14, 0, tzinfo=timezone.utc)
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _at(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_fixture_not_due():
+    result = http_probe.classify_response(RENEW_URL, 200, _fixture('renew_page.html'), now=_at(2026, 3, 1))
+    assert result.due is False
+    assert result.expiry == EXPIRY
+
+
+def test_fixture_due():
+    result = http_probe.classify_response(RENEW_URL, 200, _fixture('renew_page.html'), now=_at(2026, 3, 9, 20))
+    assert result.due is True
+    assert result.expiry == EXPIRY
+
+
+def test_fixture_due_after_expiry():
+    result = http_probe.classify_response(RENEW_URL, 200, _fixture('renew_page.html'), now=_at(2026, 3, 11))
+    assert result.due is True
+
+
+def test_renew_before_hours():
+    html = _fixture('renew_page.html')
+    now = _at(2026, 3, 8, 14)
+    assert http_probe.classify_response(RENEW_URL, 200, html, now=now).due is False
+    assert http_probe.classify_response(RENEW_URL, 200, html, now=now, renew_before_hours=72).due is True
+
+
+def test_login_redirect():
+    result = http_probe.classify_response(LOGIN_URL, 200, _fixture('login_page.html'), now=_at(2026, 3, 1))
+    assert result.due is None
+
+
+def test_login_page_without_redirect():
+    result = http_probe.classify_response(RENEW_URL, 200, _fixture('login_page.html'), now=_at(2026, 3, 1))
+    assert result.due is None
+
+
+def test_error_status_undecidable():
+    result = http_probe.classify_response(RENEW_URL, 502, 'Bad gateway', now=_at(2026, 3, 1))
+    assert result.due is None
+
+
+def test_page_without_expiry_or_button_undecidable():
+    html = '<html><body><h1>Server #123456</h1><p>Loading...</p></body></html>'
+    result = http_probe.classify_response(RENEW_URL, 200, html, now=_at(2026, 3, 1))
+    assert result.due is None
+    assert result.expiry is None
+
+
+def test_expiry_ignores_other_dates():
+    now = _at(2026, 3, 1)
+    assert http_probe.find_expiry('Expires in 3 days, created 2024-01-01', now) == _at(2026, 3, 4)
+    assert http_probe.find_expiry('Expired servers are deleted after 2024-01-01', now) is None
+    assert http_probe.find_expiry('Created 2024-01-01 Expiry: 2026-03-10', now) == _at(2026, 3, 10)
+
+
+def test_expiry_formats():
+    now = _at(2026, 3, 1)
+    assert http_probe.find_expiry('Expiry date: March 10, 2026', now) == _at(2026, 3, 10)
+    assert http_probe.find_expiry('Expiration 10 March 2026', now) == _at(2026, 3, 10)
+    assert http_probe.find_expiry('到期时间：2026-03-10 14:00', now) == EXPIRY
+
+
+def test_button_state_without_expiry():
+    enabled = '<button class="btn btn-outline-primary">Renew</button>'
+    disabled = '<button class="btn btn-outline-primary" disabled>Renew</button>'
+    assert http_probe.parse_renew_page(enabled).due is True
+    assert http_probe.parse_renew_page(disabled).due is False
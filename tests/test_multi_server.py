@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多台服务器续期的测试 - 用桩后端驱动 run_with_backend，检查每台服务器的尝试次数、
+只重试仍失败的服务器、标签页内会话失效时回退到登录检查点
+    python -m pytest tests
+"""
+
+import os
+import sys
+import asyncio
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_backend import BrowserBackend, current_tab  # noqa: E402
+
+BASE = 'https://dashboard.katabump.com/servers/edit?id='
+
+
+class Tab:
+    def __init__(self):
+        self.url = None
+
+
+class StubBackend(BrowserBackend):
+    """id=2 的续期按钮总是点击失败；id=3 第一次打开续期页时被重定向到登录页"""
+
+    name = 'stub'
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        self.running = False
+        self.logins = 0
+        self.opens = Counter()
+        self.clicks = Counter()
+        self.tabs_opened = []
+        self.main_tab = Tab()
+
+    @property
+    def tab_state(self):
+        return current_tab.get() or self.main_tab
+
+    def _server(self):
+        return self.tab_state.url.rsplit('=', 1)[-1]
+
+    async def start(self):
+        self.running = True
+        return True
+
+    async def close(self):
+        self.running = False
+
+    async def alive(self):
+        return self.running
+
+    async def add_cookies(self, cookies):
+        return True
+
+    async def get_cookies(self):
+        return []
+
+    async def login(self):
+        self.logins += 1
+        return True
+
+    async def open_renew_page(self, url=None):
+        self.tab_state.url = url
+        server = self._server()
+        self.opens[server] += 1
+        return not (server == '3' and self.opens[server] == 1)
+
+    async def click_renew(self):
+        server = self._server()
+        self.clicks[server] += 1
+        if server == '2':
+            raise RuntimeError('找不到续期按钮')
+
+    async def verify(self):
+        return True
+
+    async def settle(self):
+        pass
+
+    async def capture(self, name):
+        pass
+
+    async def new_tab(self):
+        tab = Tab()
+        self.tabs_opened.append(tab)
+        return tab
+
+    async def close_tab(self, handle):
+        pass
+
+
+def test_failing_servers_retried_up_to_limit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ('SESSION_DIR', 'HISTORY_PATH', 'RUN_REPORT_PATH', 'RUN_DEADLINE', 'WATERFALL'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('EMAIL', 'user@example.com')
+    monkeypatch.setenv('PASSWORD', 'secret')
+    monkeypatch.setenv('RENEW_URL', ','.join(BASE + server for server in ('1', '2', '3')))
+    monkeypatch.setenv('RENEW_CONCURRENCY', '3')
+    monkeypatch.setenv('HEADLESS', '1')
+    monkeypatch.setenv('RETRY_LIMIT', '2')
+    monkeypatch.setenv('RETRY_BACKOFF', '0')
+    monkeypatch.setenv('SCREENSHOT_POLICY', 'never')
+    from main import RealMouseRenewBot
+
+    bot = RealMouseRenewBot()
+    backend = StubBackend(bot)
+    try:
+        success = asyncio.run(bot.run_with_backend(backend))
+    finally:
+        bot.screenshots.close(failed=True)
+
+    assert success is False
+    # 每台服务器最多尝试 RETRY_LIMIT+1 次，成功的服务器不再重试
+    assert backend.clicks == {'1': 1, '2': 3, '3': 1}
+    # id=3 被重定向后回到 logged_in 重新登录，第二次打开续期页成功
+    assert backend.opens == {'1': 1, '2': 3, '3': 2}
+    assert backend.logins == 2
+    assert len(backend.tabs_opened) == 6
+
+    servers = {item['server']: item for item in bot.report.extra['servers']}
+    assert [item['server'] for item in bot.report.extra['servers']] == ['1', '2', '3']
+    assert servers['1']['success'] is True
+    assert servers['2']['success'] is False
+    assert servers['3']['success'] is True
+    assert 'error' not in servers['2']
+
+    events = [(item['event'], item['step']) for item in bot.report.extra['checkpoints']]
+    assert events.count(('checkpoint', 'logged_in')) == 2
+    assert ('retry', 'logged_in') in events
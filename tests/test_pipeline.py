@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+阶段流水线的测试 - 检查点、回退、向外层流水线上抛、致命错误和浏览器崩溃后的重试
+    python -m pytest tests
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deadline import DeadlineExceeded  # noqa: E402
+from pipeline import Pipeline, PhaseFailed, Step  # noqa: E402
+
+
+class Script:
+    """记录阶段调用顺序；failures 为 {阶段名: [第1次调用抛出的异常, 第2次..., ...]}，None 表示成功"""
+
+    def __init__(self, failures=None):
+        self.calls = []
+        self.failures = failures or {}
+
+    def step(self, name, durable=False):
+        async def action():
+            self.calls.append(name)
+            plan = self.failures.get(name) or []
+            attempt = self.calls.count(name) - 1
+            error = plan[attempt] if attempt < len(plan) else None
+            if error is not None:
+                raise error
+        return Step(name, action, durable)
+
+
+def _pipeline(script, retries=2, **kwargs):
+    steps = [
+        script.step('browser_up', durable=True),
+        script.step('logged_in', durable=True),
+        script.step('on_renew_page'),
+        script.step('renew_clicked'),
+        script.step('verified'),
+    ]
+    return Pipeline(steps, retries=retries, backoff=0, **kwargs)
+
+
+def _run(pipeline):
+    return asyncio.run(pipeline.run())
+
+
+def test_all_steps_succeed():
+    script = Script()
+    pipeline = _pipeline(script)
+    assert _run(pipeline) is True
+    assert script.calls == ['browser_up', 'logged_in', 'on_renew_page', 'renew_clicked', 'verified']
+    assert pipeline.checkpoints == script.calls
+
+
+def test_resume_after_last_durable_checkpoint():
+    script = Script({'verified': [RuntimeError('未验证')]})
+    pipeline = _pipeline(script)
+    assert _run(pipeline) is True
+    # 页面级检查点作废，从 logged_in 之后重新开始
+    assert script.calls == ['browser_up', 'logged_in', 'on_renew_page', 'renew_clicked', 'verified',
+                            'on_renew_page', 'renew_clicked', 'verified']
+    retry = next(item for item in pipeline.history if item['event'] == 'retry')
+    assert retry['step'] == 'on_renew_page'
+
+
+def test_rollback_to_checkpoint():
+    script = Script({'on_renew_page': [PhaseFailed('被重定向到登录页', rollback_to='logged_in')]})
+    pipeline = _pipeline(script)
+    assert _run(pipeline) is True
+    assert script.calls == ['browser_up', 'logged_in', 'on_renew_page', 'logged_in', 'on_renew_page',
+                            'renew_clicked', 'verified']
+
+
+def test_rollback_to_unknown_checkpoint_escalates():
+    script = Script()
+    pipeline = Pipeline([script.step('on_renew_page')], retries=2, backoff=0)
+    script.failures['on_renew_page'] = [PhaseFailed('会话失效', rollback_to='logged_in')]
+    with pytest.raises(PhaseFailed) as error:
+        _run(pipeline)
+    assert error.value.rollback_to == 'logged_in'
+    assert script.calls == ['on_renew_page']
+    assert pipeline.history[-1]['event'] == 'escalated'
+
+
+@pytest.mark.parametrize('error', [DeadlineExceeded('超时'), ImportError('缺少依赖')])
+def test_fatal_errors_are_not_retried(error):
+    script = Script({'renew_clicked': [error]})
+    failures = []
+
+    async def on_failure(step, error, attempt):
+        failures.append(step)
+
+    pipeline = _pipeline(script, on_failure=on_failure)
+    with pytest.raises(type(error)):
+        _run(pipeline)
+    assert script.calls == ['browser_up', 'logged_in', 'on_renew_page', 'renew_clicked']
+    assert failures == []
+    assert pipeline.history[-1]['event'] == 'fatal'
+
+
+def test_failed_health_check_resets_and_starts_over():
+    script = Script({'renew_clicked': [RuntimeError('浏览器崩溃')]})
+    resets = []
+
+    async def health_check():
+        return False
+
+    async def reset():
+        resets.append(True)
+
+    pipeline = _pipeline(script, health_check=health_check, reset=reset)
+    assert _run(pipeline) is True
+    assert resets == [True]
+    assert script.calls == ['browser_up', 'logged_in', 'on_renew_page', 'renew_clicked',
+                            'browser_up', 'logged_in', 'on_renew_page', 'renew_clicked', 'verified']
+
+
+def test_gives_up_after_retry_limit():
+    script = Script({'verified': [RuntimeError('未验证')] * 10})
+    attempts = []
+
+    async def on_failure(step, error, attempt):
+        attempts.append((step, attempt))
+
+    pipeline = _pipeline(script, retries=2, on_failure=on_failure)
+    assert _run(pipeline) is False
+    assert script.calls.count('verified') == 3
+    assert script.calls.count('logged_in') == 1
+    assert attempts == [('verified', 1), ('verified', 2), ('verified', 3)]
+
+
+def test_zero_retries():
+    script = Script({'on_renew_page': [RuntimeError('加载失败')]})
+    pipeline = _pipeline(script, retries=0)
+    assert _run(pipeline) is False
+    assert script.calls == ['browser_up', 'logged_in', 'on_renew_page']
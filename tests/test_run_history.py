@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行历史 next-due 判断的测试
+    python -m pytest tests
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_history import RunHistory  # noqa: E402
+
+URL = 'https://dashboard.katabump.com/servers/edit?id=123456'
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _history(tmp_path, *runs):
+    history = RunHistory(str(tmp_path / 'run_history.json'))
+    for run in runs:
+        history.append(run)
+    return history
+
+
+def _run(finished_at, success=True, expiry=None):
+    return {
+        'finished_at': finished_at.isoformat(),
+        'success': success,
+        'servers': {URL: expiry.isoformat() if expiry else None},
+    }
+
+
+def test_no_history_is_due(tmp_path):
+    assert _history(tmp_path).next_due(now=NOW).due is True
+
+
+def test_known_expiry_not_due(tmp_path):
+    history = _history(tmp_path, _run(NOW - timedelta(hours=1), expiry=NOW + timedelta(days=3)))
+    result = history.next_due(now=NOW)
+    assert result.due is False
+    assert result.due_at == NOW + timedelta(days=2)
+
+
+def test_known_expiry_due(tmp_path):
+    history = _history(tmp_path, _run(NOW - timedelta(hours=1), expiry=NOW + timedelta(hours=20)))
+    assert history.next_due(now=NOW).due is True
+
+
+def test_unknown_expiry_waits_for_interval(tmp_path):
+    history = _history(tmp_path, _run(NOW - timedelta(hours=6)))
+    result = history.next_due(now=NOW)
+    assert result.due is False
+    assert result.wait == timedelta(hours=18)
+
+
+def test_unknown_expiry_due_after_interval(tmp_path):
+    history = _history(tmp_path, _run(NOW - timedelta(hours=25)))
+    assert history.next_due(now=NOW).due is True
+
+
+def test_unknown_expiry_uses_last_successful_run(tmp_path):
+    history = _history(
+        tmp_path,
+        _run(NOW - timedelta(hours=30)),
+        _run(NOW - timedelta(hours=6), success=False),
+    )
+    assert history.next_due(now=NOW).due is True
+
+
+def test_unknown_expiry_without_success_is_due(tmp_path):
+    history = _history(tmp_path, _run(NOW - timedelta(hours=1), success=False))
+    assert history.next_due(now=NOW).due is True
+
+
+def test_expiry_before_renewal_is_discarded(tmp_path):
+    history = _history(
+        tmp_path,
+        _run(NOW - timedelta(days=3), expiry=NOW + timedelta(hours=2)),
+        _run(NOW - timedelta(hours=1)),
+    )
+    result = history.next_due(now=NOW)
+    assert result.due is False
+    assert result.wait == timedelta(hours=23)
+
+
+def test_expiry_survives_failed_run(tmp_path):
+    history = _history(
+        tmp_path,
+        _run(NOW - timedelta(days=1), expiry=NOW + timedelta(days=3)),
+        _run(NOW - timedelta(hours=1), success=False),
+    )
+    result = history.next_due(now=NOW)
+    assert result.due is False
+    assert result.due_at == NOW + timedelta(days=2)
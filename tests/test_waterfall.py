@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网络瀑布图的测试 - 用合成的CDP事件检查页面汇总
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from waterfall import Waterfall  # noqa: E402
+
+RENEW_URL = 'https://dashboard.katabump.com/servers/edit?id=1'
+LOGIN_URL = 'https://dashboard.katabump.com/auth/login'
+
+
+def _response(url, status, ttfb_ms):
+    return {'url': url, 'status': status, 'mimeType': 'text/html', 'protocol': 'h2',
+            'timing': {'sendStart': 1.0, 'sendEnd': 2.0, 'receiveHeadersEnd': ttfb_ms}}
+
+
+def test_document_ttfb_uses_final_document_after_redirect(tmp_path):
+    waterfall = Waterfall(str(tmp_path / 'waterfall.json'))
+    waterfall.begin('renew_page_load', RENEW_URL)
+    waterfall.add_event('Network.requestWillBeSent', {
+        'requestId': '1', 'type': 'Document', 'timestamp': 100.0, 'wallTime': 1700000000.0,
+        'request': {'url': RENEW_URL, 'method': 'GET'},
+    })
+    # 302 到登录页：同一个 requestId 的第二跳
+    waterfall.add_event('Network.requestWillBeSent', {
+        'requestId': '1', 'type': 'Document', 'timestamp': 100.03, 'wallTime': 1700000000.03,
+        'request': {'url': LOGIN_URL, 'method': 'GET'},
+        'redirectResponse': _response(RENEW_URL, 302, 20.0),
+    })
+    waterfall.add_event('Network.responseReceived', {
+        'requestId': '1', 'type': 'Document', 'timestamp': 100.11, 'response': _response(LOGIN_URL, 200, 80.0),
+    })
+    waterfall.add_event('Network.loadingFinished', {'requestId': '1', 'timestamp': 100.15, 'encodedDataLength': 4096})
+    waterfall.add_event('Page.loadEventFired', {'timestamp': 100.2})
+
+    har = waterfall.to_har()
+    page = har['log']['pages'][0]
+    assert page['_summary']['requests'] == 2
+    assert page['_summary']['document_ttfb_ms'] == 80.0
+    assert [entry['response']['status'] for entry in har['log']['entries']] == [302, 200]
+    assert all(entry['timings']['receive'] >= 0 for entry in har['log']['entries'])
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+条件等待 - 用真实的页面状态代替固定的 time.sleep
+每个等待都有独立的超时和轮询间隔，并记录实际等待时长
+"""
+
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class WaitTimeout(TimeoutError):
+    """条件在超时时间内没有满足"""
+
+
+class Waiter:
+    """轮询条件直到满足或超时"""
+
+    def __init__(self, driver, timeout=30, poll=0.25, deadline=None):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll = poll
+        # 设置后每次等待的超时都截断到剩余时间内，时间用完抛出 DeadlineExceeded
+        self.deadline = deadline
+        # 每次等待的记录: (描述, 实际等待秒数, 是否满足)
+        self.history = []
+
+    def until(self, condition, desc='', timeout=None, poll=None, required=True):
+        """等待 condition(driver) 返回真值，返回该值；超时时 required 为真则抛出 WaitTimeout，否则返回 None"""
+        timeout = self.timeout if timeout is None else timeout
+        poll = self.poll if poll is None else poll
+        desc = desc or getattr(condition, '__name__', 'condition')
+        if self.deadline is not None:
+            timeout = self.deadline.clamp(timeout)
+
+        start = time.monotonic()
+        last_error = None
+        while True:
+            try:
+                value = condition(self.driver)
+                if value:
+                    elapsed = time.monotonic() - start
+                    self.history.append((desc, elapsed, True))
+                    logger.info(f'⏱️ 等待 {desc} 完成，用时 {elapsed:.2f}秒')
+                    return value
+            except Exception as e:
+                last_error = e
+
+            elapsed = time.monotonic() - start
+            if elapsed >= timeout:
+                break
+            time.sleep(min(poll, max(timeout - elapsed, 0)))
+
+        elapsed = time.monotonic() - start
+        self.history.append((desc, elapsed, False))
+        message = f'等待 {desc} 超时 ({elapsed:.2f}/{timeout}秒)'
+        if last_error is not None:
+            message += f'，最后错误: {last_error}'
+        if required:
+            raise WaitTimeout(message)
+        logger.warning(f'⚠️ {message}')
+        return None
+
+
+# ---- 条件 ----
+# 每个条件都是接收 driver 的可调用对象，与 selenium 的 expected_conditions 用法一致。
+
+def url_not_contains(fragment):
+    """当前URL不再包含指定片段（例如离开登录页）"""
+    def _condition(driver):
+        return fragment not in driver.current_url
+    _condition.__name__ = f'URL离开 {fragment}'
+    return _condition
+
+
+def document_ready():
+    """document.readyState == 'complete'"""
+    def _condition(driver):
+        return driver.execute_script('return document.readyState') == 'complete'
+    _condition.__name__ = '页面加载完成'
+    return _condition
+
+
+def field_value_equals(element, expected):
+    """输入框的值等于期望内容（按键已全部送达）"""
+    def _condition(driver):
+        return element.get_attribute('value') == expected
+    _condition.__name__ = '输入完成'
+    return _condition
+
+
+def any_of(*conditions):
+    """任意一个条件满足即可，返回第一个真值"""
+    def _condition(driver):
+        for condition in conditions:
+            try:
+                value = condition(driver)
+            except Exception:
+                continue
+            if value:
+                return value
+        return False
+    _condition.__name__ = ' 或 '.join(getattr(c, '__name__', 'condition') for c in conditions)
+    return _condition
+
+
+# 在页面中统计进行中的 fetch/XHR 请求数量，并记录最后一次变化的时间
+_NETWORK_IDLE_JS = """
+const idleMs = arguments[0];
+if (!window.__kbNet) {
+    const state = window.__kbNet = {inflight: 0, changed: performance.now()};
+    const bump = (delta) => { state.inflight += delta; state.changed = performance.now(); };
+    const origFetch = window.fetch;
+    if (origFetch) {
+        window.fetch = function() {
+            bump(1);
+            return origFetch.apply(this, arguments).finally(() => bump(-1));
+        };
+    }
+    const origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        bump(1);
+        this.addEventListener('loadend', () => bump(-1), {once: true});
+        return origSend.apply(this, arguments);
+    };
+}
+const state = window.__kbNet;
+return document.readyState === 'complete'
+    && state.inflight <= 0
+    && performance.now() - state.changed >= idleMs;
+"""
+
+
+def network_idle(idle_ms=500):
+    """页面加载完成且在 idle_ms 内没有进行中的 fetch/XHR 请求"""
+    def _condition(driver):
+        return driver.execute_script(_NETWORK_IDLE_JS, idle_ms)
+    _condition.__name__ = f'网络空闲 {idle_ms}ms'
+    return _condition
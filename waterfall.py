@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网络瀑布图 - 把CDP的 Network/Page 事件整理成每个页面的请求列表（HAR 1.2 的子集）
+每个请求记录URL、资源类型、状态码、传输大小、TTFB和总耗时，每个页面汇总请求数、
+总大小、加载时间和第三方请求，用于判断时间花在面板后端、第三方脚本还是客户端
+
+    WATERFALL=1       启用（默认关闭，性能日志本身有开销）
+    WATERFALL_PATH    输出文件，默认与运行报告放在同一目录的 waterfall.json
+
+Selenium后端从 chromedriver 的 performance 日志读取事件，Playwright后端通过CDP会话订阅；
+页面边界是每次导航和表单提交（以 RunReport 当前阶段命名）。
+"""
+
+import os
+import json
+import logging
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 需要的CDP事件
+EVENTS = (
+    'Network.requestWillBeSent',
+    'Network.responseReceived',
+    'Network.loadingFinished',
+    'Network.loadingFailed',
+    'Page.domContentEventFired',
+    'Page.loadEventFired',
+)
+
+
+def waterfall_enabled():
+    return os.getenv('WATERFALL', '').lower() in ('1', 'true', 'yes')
+
+
+def _iso(wall_time):
+    return datetime.fromtimestamp(wall_time, timezone.utc).isoformat(timespec='milliseconds')
+
+
+def _span(timing, start, end):
+    """CDP timing 中的一段（毫秒），不存在时为 -1（与HAR一致）"""
+    if timing.get(start, -1) < 0 or timing.get(end, -1) < 0:
+        return -1
+    return round(timing[end] - timing[start], 1)
+
+
+def _site(url):
+    """注册域名的近似值：主机名的最后两段"""
+    host = urlparse(url).hostname or ''
+    return '.'.join(host.split('.')[-2:])
+
+
+class Waterfall:
+    """收集CDP事件，按页面输出类HAR的JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self.pages = []
+        self.entries = []
+        self._pending = {}  # requestId -> 进行中的请求
+        self._page = None
+
+    @classmethod
+    def from_env(cls):
+        """WATERFALL 未启用时返回 None"""
+        if not waterfall_enabled():
+            return None
+        path = os.getenv('WATERFALL_PATH')
+        if not path:
+            report_path = os.getenv('RUN_REPORT_PATH')
+            path = os.path.join(os.path.dirname(report_path) if report_path else '', 'waterfall.json')
+        return cls(path)
+
+    def begin(self, title, url=None):
+        """开始新页面，之后发起的请求都归入该页面"""
+        self._page = {'id': f'page_{len(self.pages) + 1}', 'title': title, '_url': url, '_events': {}}
+        self.pages.append(self._page)
+
+    # ---- 事件 ----
+
+    def add_performance_log(self, entries):
+        """chromedriver performance 日志（driver.get_log('performance')）"""
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, TypeError, ValueError):
+                continue
+            if message.get('method') in EVENTS:
+                self.add_event(message['method'], message.get('params') or {})
+
+    def add_event(self, method, params):
+        if method.startswith('Page.'):
+            if self._page is not None:
+                self._page['_events'].setdefault(method, params.get('timestamp'))
+            return
+
+        request_id = params.get('requestId')
+        if method == 'Network.requestWillBeSent':
+            if self._page is None:
+                self.begin('startup')
+            previous = self._pending.pop(request_id, None)
+            if previous is not None and params.get('redirectResponse'):
+                # 重定向：同一个 requestId 的上一跳到此结束
+                self._apply_response(previous, params['redirectResponse'])
+                previous['end'] = params.get('timestamp')
+                self.entries.append(previous)
+            request = params.get('request') or {}
+            self._pending[request_id] = {
+                'pageref': self._page['id'],
+                'url': request.get('url', ''),
+                'method': request.get('method', 'GET'),
+                'type': params.get('type'),
+                'start': params.get('timestamp'),
+                'wall_time': params.get('wallTime'),
+                'end': None,
+                'status': None,
+                'size': None,
+            }
+            return
+
+        entry = self._pending.get(request_id)
+        if entry is None:
+            return
+        if method == 'Network.responseReceived':
+            self._apply_response(entry, params.get('response') or {})
+            entry['type'] = params.get('type') or entry['type']
+        elif method == 'Network.loadingFinished':
+            entry['end'] = params.get('timestamp')
+            entry['size'] = params.get('encodedDataLength')
+            self.entries.append(self._pending.pop(request_id))
+        elif method == 'Network.loadingFailed':
+            entry['end'] = params.get('timestamp')
+            entry['error'] = params.get('blockedReason') or params.get('errorText') or 'failed'
+            entry['blocked'] = bool(params.get('blockedReason'))
+            self.entries.append(self._pending.pop(request_id))
+
+    @staticmethod
+    def _apply_response(entry, response):
+        entry['status'] = response.get('status')
+        entry['mime_type'] = response.get('mimeType')
+        entry['protocol'] = response.get('protocol')
+        entry['from_cache'] = bool(response.get('fromDiskCache') or response.get('fromServiceWorker'))
+        entry['timing'] = response.get('timing') or {}
+
+    # ---- 输出 ----
+
+    def _har_entry(self, entry, first_party):
+        timing = entry.get('timing') or {}
+        total = (entry['end'] - entry['start']) * 1000 if entry['end'] and entry['start'] else None
+        ttfb = round(timing['receiveHeadersEnd'], 1) if timing.get('receiveHeadersEnd', -1) >= 0 else None
+        receive = round(max(total - ttfb, 0), 1) if total is not None and ttfb is not None else -1
+        har = {
+            'pageref': entry['pageref'],
+            'startedDateTime': _iso(entry['wall_time']) if entry.get('wall_time') else None,
+            'time': round(total, 1) if total is not None else None,
+            'request': {'method': entry['method'], 'url': entry['url']},
+            'response': {
+                'status': entry.get('status'),
+                'httpVersion': entry.get('protocol'),
+                'content': {'mimeType': entry.get('mime_type')},
+                '_transferSize': entry.get('size'),
+            },
+            'timings': {
+                'blocked': round(timing['dnsStart'], 1) if timing.get('dnsStart', -1) >= 0 else -1,
+                'dns': _span(timing, 'dnsStart', 'dnsEnd'),
+                'connect': _span(timing, 'connectStart', 'connectEnd'),
+                'ssl': _span(timing, 'sslStart', 'sslEnd'),
+                'send': _span(timing, 'sendStart', 'sendEnd'),
+                'wait': _span(timing, 'sendEnd', 'receiveHeadersEnd'),
+                'receive': receive,
+            },
+            '_resourceType': entry.get('type'),
+            '_ttfb': ttfb,
+            '_fromCache': entry.get('from_cache', False),
+            '_thirdParty': _site(entry['url']) != first_party if first_party else None,
+            '_start': entry['start'],
+        }
+        if 'error' in entry:
+            har['_error'] = entry['error']
+            har['_blocked'] = entry.get('blocked', False)
+        if entry['end'] is None:
+            har['_pending'] = True
+        return har
+
+    def to_har(self):
+        entries_by_page = {}
+        for entry in self.entries + list(self._pending.values()):
+            entries_by_page.setdefault(entry['pageref'], []).append(entry)
+
+        pages = []
+        entries = []
+        for page in self.pages:
+            raw = sorted(entries_by_page.get(page['id'], []), key=lambda e: e['start'] or 0)
+            if not raw:
+                continue
+            first = raw[0]
+            first_party = _site(page.get('_url') or first['url'])
+            items = [self._har_entry(entry, first_party) for entry in raw]
+            start = first['start']
+            ends = [e['end'] for e in raw if e['end']]
+            events = page['_events']
+            relative = lambda ts: round((ts - start) * 1000, 1) if ts and start else -1
+            # 重定向的每一跳都是单独的 Document 请求，TTFB 取最终文档（非3xx）
+            documents = [item for item in items if item['_resourceType'] == 'Document']
+            final = [item for item in documents if not 300 <= (item['response']['status'] or 0) < 400]
+            document = (final or documents or [None])[-1]
+            third_party = [item for item in items if item['_thirdParty']]
+            pages.append({
+                'id': page['id'],
+                'title': page['title'],
+                'startedDateTime': _iso(first['wall_time']) if first.get('wall_time') else None,
+                'pageTimings': {
+                    'onContentLoad': relative(events.get('Page.domContentEventFired')),
+                    'onLoad': relative(events.get('Page.loadEventFired')),
+                },
+                '_url': page.get('_url'),
+                '_summary': {
+                    'requests': len(items),
+                    'transfer_bytes': sum(item['response']['_transferSize'] or 0 for item in items),
+                    'load_ms': round((max(ends) - start) * 1000, 1) if ends and start else None,
+                    'document_ttfb_ms': document['_ttfb'] if document else None,
+                    'failed': sum(1 for item in items if '_error' in item and not item['_blocked']),
+                    'blocked': sum(1 for item in items if item.get('_blocked')),
+                    'third_party_requests': len(third_party),
+                    'third_party_bytes': sum(item['response']['_transferSize'] or 0 for item in third_party),
+                },
+            })
+            for item in items:
+                item['_offset_ms'] = relative(item.pop('_start'))
+            entries.extend(items)
+
+        return {'log': {'version': '1.2', 'creator': {'name': 'katabump-renew', 'version': '1'},
+                        'pages': pages, 'entries': entries}}
+
+    def write(self):
+        """写出文件并输出每个页面的摘要，然后清空（守护进程下一次续期重新收集）"""
+        har = self.to_har()
+        for page in har['log']['pages']:
+            summary = page['_summary']
+            ttfb = summary['document_ttfb_ms']
+            logger.info(
+                f'🌊 {page["title"]}: {summary["requests"]} 个请求，{summary["transfer_bytes"] / 1024:.0f}KB，'
+                f'加载 {summary["load_ms"] or 0:.0f}ms'
+                + (f'，文档TTFB {ttfb:.0f}ms' if ttfb is not None else '')
+                + f'，第三方 {summary["third_party_requests"]} 个'
+                + (f'，拦截 {summary["blocked"]} 个' if summary['blocked'] else '')
+            )
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(har, f, ensure_ascii=False, indent=2)
+            logger.info(f'🌊 网络瀑布图已保存: {self.path}')
+        except OSError as e:
+            logger.warning(f'⚠️ 网络瀑布图保存失败: {e}')
+        self.pages = []
+        self.entries = []
+        self._pending = {}
+        self._page = None
+        return self.path